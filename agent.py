@@ -1,16 +1,134 @@
+from board import BoardView, occupancy_hash, zobrist_keys
+from collections import OrderedDict, deque
+import copy
+import functools
 from gameobjects import GameObject as GO
 from move import Move
-from sortedcontainers import SortedListWithKey
-import copy
+import heapq
+import itertools
+import sys
+import threading
+import time
+
+FREE = (GO.FOOD, GO.EMPTY)
+
+
+@functools.lru_cache(maxsize=None)
+def empty_trail(nr_cells):
+    """
+    A trail is a persistent set of cell ids: a tree of which the leaves are integers of 1024 bits, one bit per cell,
+    and the other nodes tuples of 32 children. Adding a cell copies only the nodes on the path to its leaf, so both
+    adding and looking up a cell cost the same on any board: a board of up to 1024 cells has a single leaf, a board
+    of up to a million cells two levels of nodes above the leaves.
+
+    :return: A (root, shifts) tuple: the root of the empty trail for a board with nr_cells cells, and per level from
+    the root down the shift which selects the child from the index of a leaf (cell_id >> 10).
+    """
+    nr_leaves = (nr_cells + 1023) >> 10
+    shifts = ()
+    while 1 << 5 * len(shifts) < nr_leaves:
+        shifts = (5 * len(shifts),) + shifts
+    root = 0
+    for _ in shifts:
+        root = (root,) * 32
+    return root, shifts
+
+
+class SearchState:
+    """The board as seen by a search node: the (read-only) board at the root of the search plus the cells the snake
+    occupied since then. Those cells are kept in a trail (see empty_trail), so deriving the state of a child node
+    copies a few small nodes and never the board, whatever its size. The Zobrist hash of the occupancy (see
+    board.zobrist_keys) is updated along, it identifies the state in the TranspositionTable."""
+
+    __slots__ = ["board", "width", "height", "trail", "shifts", "occupancy", "keys"]
+
+    def __init__(self, board, trail=None, shifts=None, occupancy=None, keys=None):
+        self.board = board
+        self.width = len(board)
+        self.height = len(board[0])
+        if trail is None:
+            trail, shifts = empty_trail(self.width * self.height)
+        self.trail = trail
+        self.shifts = shifts
+        if occupancy is None:
+            occupancy = board.occupancy_hash if isinstance(board, BoardView) else occupancy_hash(board)
+        self.occupancy = occupancy
+        self.keys = keys if keys is not None else zobrist_keys(self.width, self.height)
+
+    def contains(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def corners(self):
+        return [Point(0, 0), Point(0, self.height - 1), Point(self.width - 1, 0), Point(self.width - 1, self.height - 1)]
+
+    def cell_id(self, x, y):
+        return x * self.height + y
+
+    def get(self, x, y):
+        cell_id = x * self.height + y
+        node = self.trail
+        if self.shifts:
+            leaf = cell_id >> 10
+            for shift in self.shifts:
+                node = node[leaf >> shift & 31]
+        if node >> (cell_id & 1023) & 1:
+            return GO.SNAKE_BODY
+        return self.board[x][y]
+
+    def occupy(self, x, y):
+        """:return: The state in which the snake also occupies the given free cell."""
+        cell_id = x * self.height + y
+        if self.shifts:
+            leaf = cell_id >> 10
+            path = []
+            node = self.trail
+            for shift in self.shifts:
+                index = leaf >> shift & 31
+                path.append((node, index))
+                node = node[index]
+            node |= 1 << (cell_id & 1023)
+            for parent, index in reversed(path):
+                children = list(parent)
+                children[index] = node
+                node = tuple(children)
+        else:
+            node = self.trail | 1 << cell_id
+        # copies the other attributes instead of deriving them from the board again
+        state = SearchState.__new__(SearchState)
+        state.board = self.board
+        state.width = self.width
+        state.height = self.height
+        state.trail = node
+        state.shifts = self.shifts
+        state.occupancy = self.occupancy ^ self.keys[cell_id]
+        state.keys = self.keys
+        return state
 
 
 class Node:
-    def __init__(self, state, snake_head, direction, path_cost, moves=[]):
+    __slots__ = ["state", "snake_head", "direction", "path_cost", "parent", "last_move"]
+
+    def __init__(self, state, snake_head, direction, path_cost, parent=None, last_move=None):
         self.state = state
         self.snake_head = snake_head
         self.direction = direction
         self.path_cost = path_cost
-        self.moves = moves
+        self.parent = parent
+        self.last_move = last_move
+
+    @property
+    def moves(self):
+        moves = []
+        node = self
+        while node.parent is not None:
+            moves.append(node.last_move)
+            node = node.parent
+        moves.reverse()
+        return moves
+
+    def key(self):
+        """:return: An integer identifying the (snake head, direction) state of the node within its search."""
+        return self.state.cell_id(self.snake_head.x, self.snake_head.y) << 2 | self.direction.value
 
     def __lt__(self, other):
         return self.path_cost < other.path_cost
@@ -22,16 +140,15 @@ class Node:
         return "Node(sh=%s, dir=%s, pc=%s" % (self.snake_head, self.direction, self.path_cost)
 
     def move(self, move):
-        direction = self.direction.get_new_direction(move)
-        dx, dy = direction.get_xy_manipulation()
+        _, direction, dx, dy = self.direction.get_transitions()[move.value + 1]
         new_snake_head = self.snake_head.move(dx, dy)
-        board_copy = self.state[:]
-        board_copy[self.snake_head.x][self.snake_head.y] = GO.SNAKE_BODY
-        board_copy[new_snake_head.x][new_snake_head.y] = GO.SNAKE_HEAD
-        return Node(board_copy, new_snake_head, direction, self.path_cost + 1, self.moves + [move])
+        return Node(self.state.occupy(new_snake_head.x, new_snake_head.y), new_snake_head, direction,
+                    self.path_cost + 1, self, move)
 
 
 class Point:
+    __slots__ = ["x", "y"]
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -47,47 +164,336 @@ class Point:
         return "Point(%s,%s)" % (self.x, self.y)
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return self.x == other.x and self.y == other.y
 
+    def __hash__(self):
+        return hash((self.x, self.y))
 
-class Problem:
-    corners = [Point(0, 0), Point(0, 24), Point(24, 0), Point(24, 24)]
 
-    def __init__(self, initial_state, target_location):
+class SearchStats:
+    """
+    Counters of the work done by the searches of an agent, accumulated until reset() is called. They are shared by an
+    agent and its clones like its TranspositionTable (see Agent.clone), but without a lock: the counters are only
+    exact when one thread at a time searches, as for an AsyncAgent, which runs the clones one after another in its
+    worker.
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.expansions = 0
+        # largest frontier of a single search
+        self.frontier_peak = 0
+        # safety checks in Problem.goal_test, each of them replaces at least one nested a_star_search
+        self.safety_checks = 0
+        self.safety_cache_hits = 0
+        self.nested_searches_avoided = 0
+        # decisions of the agent which ran out of their Budget
+        self.budget_overruns = 0
+        # checks of the current plan against the changed cells, plans repaired by a detour and full replans
+        self.plan_revalidations = 0
+        self.plan_repairs = 0
+        self.replans = 0
+
+    def reset(self):
+        self.__init__()
+
+
+class TranspositionTable:
+    """
+    Results of the searches and safety checks of an agent. An entry is keyed by the Zobrist hash of the occupancy of
+    the board (see board.zobrist_keys) and the position of the snake, so a result is only reused when the snake is in
+    exactly the same situation again. While playing a game that hardly happens, as the tail moves every turn. It
+    does happen when a decision is made again on a board that differs only in its food: an AsyncAgent that
+    speculated on the next board and then sees new food appear (see "python benchmark.py table"). The least recently
+    used entries are evicted when the table holds capacity entries, a capacity of 0 disables the table.
+
+    A table is shared by an agent and its clones (see Agent.clone), which an AsyncAgent runs in a worker thread, so
+    every access holds a lock. A table is not sent to another process: it arrives there empty.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __reduce__(self):
+        return TranspositionTable, (self.capacity,)
+
+    def get(self, key, default=None):
+        with self.lock:
+            value = self.entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def memory(self):
+        """:return: An estimate of the memory used by the entries in bytes (the keys and values included)."""
+        with self.lock:
+            size = sys.getsizeof(self.entries)
+            for key, value in self.entries.items():
+                size += sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key) + sys.getsizeof(value)
+            return size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# marks a missing entry of the TranspositionTable
+_MISSING = object()
+
+
+class Budget:
+    """Limits the work of a single decision of the agent, in seconds and/or in expanded nodes. None means unlimited."""
+
+    def __init__(self, seconds=None, expansions=None):
+        self.deadline = None if seconds is None else time.perf_counter() + seconds
+        self.expansions_left = expansions
+        self.exhausted = False
+
+    def spend(self, expansions=1):
+        """:return: True when the budget is exhausted."""
+        if self.expansions_left is not None:
+            self.expansions_left -= expansions
+            if self.expansions_left < 0:
+                self.exhausted = True
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+
+class Plan:
+    """The moves the agent intends to make, together with the cells the head enters and the direction it faces after
+    each move. The plan depends on these cells only, so it can be revalidated against the cells which changed on the
+    board since it was made."""
+
+    def __init__(self, head, direction, moves, version=None):
+        self.head = (head.x, head.y)
+        self.direction = direction
+        # the version of the board the plan was last checked against
+        self.version = version
+        self.steps = deque()
+        x, y = self.head
+        for move in moves:
+            _, direction, dx, dy = direction.get_transitions()[move.value + 1]
+            x += dx
+            y += dy
+            self.steps.append((move, (x, y), direction))
+        self.cells = {cell for _, cell, _ in self.steps}
+
+    def __len__(self):
+        return len(self.steps)
+
+    @staticmethod
+    def move_towards(point, direction, location):
+        """:return: The move which takes the snake from point, facing direction, to the adjacent (x, y) location, or
+        None if the location cannot be entered in one move."""
+        for move, _, dx, dy in direction.get_transitions():
+            if (point.x + dx, point.y + dy) == location:
+                return move
+        return None
+
+    def copy(self):
+        plan = Plan.__new__(Plan)
+        plan.head = self.head
+        plan.direction = self.direction
+        plan.version = self.version
+        plan.steps = deque(self.steps)
+        plan.cells = set(self.cells)
+        return plan
+
+    def pop(self):
+        move, cell, direction = self.steps.popleft()
+        self.cells.discard(cell)
+        self.head = cell
+        self.direction = direction
+        return move
+
+
+class Problem:
+    def __init__(self, initial_state, target_location, budget=None, table=None, stats=None):
+        """
+        :param table: The TranspositionTable for the results of the search and its safety checks, None for no table.
+        :param stats: The SearchStats counting the work of the search, new ones when None.
+        """
         self.initial_state = initial_state
         self.target_location = target_location
+        self.corners = initial_state.state.corners()
+        self.budget = budget
+        self.table = table
+        self.stats = stats if stats is not None else SearchStats()
+        # identifies the goal of the search in the transposition table, None to keep its result out of the table
+        self.table_key = (target_location.x, target_location.y)
 
     def goal_test(self, node):
         if node.snake_head == self.target_location:
-            if self.target_location in Problem.corners:
+            if self.target_location in self.corners:
                 return True
-            total = 0
-            for corner in Problem.corners:
-                problem = Problem(Node(node.state, node.snake_head, node.direction, 0), corner)
-                path = Agent.a_star_search(problem)
-                total = total + 1 if path else total
-                if total > 0:
-                    return True
+            return Problem.is_safe(node, self.budget, self.table, self.stats)
         return False
 
+    def heuristic(self, point):
+        """:return: A lower bound on the number of moves from point to a goal, None if no goal can be reached."""
+        return Point.manhattan(point, self.target_location)
+
+    @staticmethod
+    def is_safe(node, budget=None, table=None, stats=None):
+        """Tells whether the snake can still reach one of the corners from the given node. Any path of the snake is
+        a path over free cells and vice versa (the cell behind the head is always occupied), so a single flood fill
+        gives the same answer as a search towards every corner. Results are kept in the given TranspositionTable,
+        the check is counted in the given SearchStats. When the budget runs out during the flood fill, the node is
+        considered unsafe."""
+        state = node.state
+        key = (state.occupancy, node.snake_head.x, node.snake_head.y)
+        if stats is None:
+            stats = SearchStats()
+        stats.nested_searches_avoided += 1
+        if table is not None:
+            safe = table.get(key)
+            if safe is not None:
+                stats.safety_cache_hits += 1
+                return safe
+        stats.safety_checks += 1
+
+        corners = {(corner.x, corner.y) for corner in state.corners()}
+        start = (node.snake_head.x, node.snake_head.y)
+        visited = {start}
+        stack = [start]
+        safe = False
+        cells_filled = 0
+        while stack and not safe:
+            cells_filled += 1
+            if budget is not None and cells_filled % 256 == 0 and budget.spend(0):
+                return False
+            x, y = stack.pop()
+            for cell in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if cell in visited or not state.contains(cell[0], cell[1]):
+                    continue
+                if state.get(cell[0], cell[1]) in FREE:
+                    if cell in corners:
+                        safe = True
+                        break
+                    visited.add(cell)
+                    stack.append(cell)
+        if table is not None:
+            table.put(key, safe)
+        return safe
+
     @staticmethod
     def actions(node):
-        for move in list(Move):
-            dx, dy = node.direction.get_new_direction(move).get_xy_manipulation()
-            new_snake_head = node.snake_head.move(dx, dy)
-            if 0 <= new_snake_head.x < 25 and 0 <= new_snake_head.y < 25 and node.state[new_snake_head.x][
-                new_snake_head.y] in [GO.FOOD, GO.EMPTY]:
-                yield move
+        for child in Problem.successors(node):
+            yield child.last_move
+
+    @staticmethod
+    def successors(node):
+        state = node.state
+        width = state.width
+        height = state.height
+        x = node.snake_head.x
+        y = node.snake_head.y
+        for move, direction, dx, dy in node.direction.get_transitions():
+            new_x = x + dx
+            new_y = y + dy
+            if 0 <= new_x < width and 0 <= new_y < height and state.get(new_x, new_y) in FREE:
+                yield Node(state.occupy(new_x, new_y), Point(new_x, new_y), direction, node.path_cost + 1, node, move)
+
+
+class RepairProblem(Problem):
+    """Searches a detour from the head towards a cell of the current plan, arriving in a direction from which the next
+    cell of the plan can be entered. The cells of the rest of the plan are marked as occupied in the initial state."""
+
+    def __init__(self, initial_state, target_location, next_location, budget=None, stats=None):
+        self.initial_state = initial_state
+        self.target_location = target_location
+        self.next_location = next_location
+        self.budget = budget
+        self.table = None
+        self.stats = stats if stats is not None else SearchStats()
+        self.table_key = None
+
+    def goal_test(self, node):
+        if node.snake_head != self.target_location:
+            return False
+        return self.next_location is None or Plan.move_towards(node.snake_head, node.direction,
+                                                               self.next_location) is not None
+
+
+class FoodProblem(Problem):
+    """Searches the nearest safe food among all food items at once, instead of a search per food item. The heuristic
+    is the Manhattan distance to the nearest food item, memoized per cell: the search stops at the first safe food
+    item it reaches, so the more food there is, the fewer cells it visits."""
+
+    def __init__(self, initial_state, targets, budget=None, table=None, stats=None):
+        self.initial_state = initial_state
+        self.targets = set(targets)
+        self.corners = initial_state.state.corners()
+        self.budget = budget
+        self.table = table
+        self.stats = stats if stats is not None else SearchStats()
+        self.target_xys = [(target.x, target.y) for target in self.targets]
+        self.distances = {}
+        self.table_key = frozenset(self.target_xys)
+
+    def goal_test(self, node):
+        if node.snake_head in self.targets:
+            if node.snake_head in self.corners:
+                return True
+            return Problem.is_safe(node, self.budget, self.table, self.stats)
+        return False
+
+    def heuristic(self, point):
+        x = point.x
+        y = point.y
+        distance = self.distances.get((x, y))
+        if distance is None:
+            if not self.target_xys:
+                return None
+            distance = min(abs(x - target_x) + abs(y - target_y) for target_x, target_y in self.target_xys)
+            self.distances[(x, y)] = distance
+        return distance
 
 
 class Agent:
-    board_height = 25
-    board_width = 25
+    # the number of cells of a blocked plan towards which a detour is tried, before planning again
+    REPAIR_ATTEMPTS = 3
 
-    def __init__(self):
+    def __init__(self, move_budget=None, expansion_budget=None, table=None, stats=None):
+        """
+        :param move_budget: The maximum number of seconds to think about a move, unlimited when None.
+        :param expansion_budget: The maximum number of nodes to expand for a move, unlimited when None.
+        :param table: The TranspositionTable of the agent, a new one when None.
+        :param stats: The SearchStats counting the work of the agent, new ones when None.
+        """
+        self.move_budget = move_budget
+        self.expansion_budget = expansion_budget
+        self.table = table if table is not None else TranspositionTable()
+        self.stats = stats if stats is not None else SearchStats()
         self.board_items = None
         self.problem = None
-        self.path = None
+        self.plan = None
         self.score = None
         self.prev_stall_move = None
 
@@ -105,6 +511,9 @@ class Agent:
         of the snake is located there) and GameObject.SNAKE_BODY (meaning there is a body part of the snake there.
         TIP: also, do not run into these). The snake will also die when it tries to escape the board (moving out of
         the boundaries of the array)
+        The board is a read-only BoardView which always shows the current state, use board.copy() to get an array
+        that can be modified. The view also provides the locations of the head (board.head), the food (board.food)
+        and the walls (board.walls).
 
         :param score: The current score as an integer. Whenever the snake eats, the score will be increased by one.
         When the snake tragically dies (i.e. by running its head into a wall) the score will be reset. In ohter
@@ -126,27 +535,122 @@ class Agent:
         Move.LEFT and Move.RIGHT changes the direction of the snake. In example, if the snake is facing north and the
         move left is made, the snake will go one block to the left and change its direction to west.
         """
+        budget = Budget(self.move_budget, self.expansion_budget)
         self.board_items = Agent.scan_board(board)
         snake_head_point = self.board_items[GO.SNAKE_HEAD]
 
-        if self.score != score:
-            foods = sorted(self.board_items[GO.FOOD], key=lambda x: Point.manhattan(snake_head_point, x))
-            for food_point in foods:
-                self.problem = Problem(Node(board, snake_head_point, direction, 0), food_point)
-                self.path = self.a_star_search(self.problem)
-                if self.path:
-                    self.score = score
-                    self.prev_stall_move = None
-                    break
+        if self.plan and not self.revalidate(board, snake_head_point, direction, budget):
+            # plan again, as if the score changed
+            self.plan = None
+            self.score = None
 
-        if self.path:
-            return self.path.pop(0)
+        if self.score != score:
+            self.stats.replans += 1
+            root_state = SearchState(board)
+            self.problem = FoodProblem(Node(root_state, snake_head_point, direction, 0), self.board_items[GO.FOOD],
+                                       budget, self.table, self.stats)
+            path = self.a_star_search(self.problem)
+            if budget.exhausted:
+                # the path is only the start of a plan: take its first step and plan again next turn
+                self.stats.budget_overruns += 1
+                self.plan = Plan(snake_head_point, direction, path[:1]) if path else None
+            elif path:
+                self.plan = Plan(snake_head_point, direction, path, getattr(board, "version", None))
+                self.score = score
+                self.prev_stall_move = None
+
+        if self.plan:
+            return self.plan.pop()
         else:
             return self.stall(board, direction)
 
+    def revalidate(self, board, snake_head_point, direction, budget):
+        """Checks whether the current plan can still be followed, looking only at the cells which changed since it was
+        last checked (or at every cell of the plan when the board does not keep track of its changes). A plan which
+        runs into a new obstacle is repaired with a detour if possible.
+
+        :return: False when the plan must be replaced by a new one.
+        """
+        self.stats.plan_revalidations += 1
+        plan = self.plan
+        if plan.head != (snake_head_point.x, snake_head_point.y) or plan.direction != direction:
+            return False
+        changes = None
+        if isinstance(board, BoardView) and plan.version is not None:
+            changes = board.changes_since(plan.version)
+            plan.version = board.version
+        if changes is None:
+            changes = plan.cells
+        elif not changes:
+            return True
+
+        blocked = None
+        for index, (_, (x, y), _) in enumerate(plan.steps):
+            if (x, y) in changes and board[x][y] not in FREE:
+                blocked = index
+                break
+        if blocked is not None:
+            return self.repair(board, snake_head_point, direction, blocked, budget)
+        if changes is not plan.cells and any(board[x][y] == GO.WALL for x, y in changes):
+            # a new wall next to the plan can close off the space around the food
+            return Problem.is_safe(self.plan_end(board, plan), budget, self.table, self.stats)
+        return True
+
+    def repair(self, board, snake_head_point, direction, blocked, budget):
+        """Replaces the blocked part of the plan (from step blocked on) by a detour towards a cell of the plan after it,
+        keeping the rest of the plan. The first REPAIR_ATTEMPTS cells after the last blocked one are tried.
+
+        :return: True when the plan was repaired and is still safe at its end.
+        """
+        plan = self.plan
+        steps = list(plan.steps)
+        # the detour rejoins the plan after its last blocked cell, so the rest of the plan only crosses free cells
+        last_blocked = max(index for index in range(blocked, len(steps))
+                           if board[steps[index][1][0]][steps[index][1][1]] not in FREE)
+        rejoins = list(range(last_blocked + 1, len(steps)))[:Agent.REPAIR_ATTEMPTS]
+        for rejoin in rejoins:
+            root_state = SearchState(board)
+            for _, (x, y), _ in steps[rejoin + 1:]:
+                root_state = root_state.occupy(x, y)
+            (x, y) = steps[rejoin][1]
+            next_location = steps[rejoin + 1][1] if rejoin + 1 < len(steps) else None
+            problem = RepairProblem(Node(root_state, snake_head_point, direction, 0), Point(x, y), next_location,
+                                    budget, self.stats)
+            detour = self.a_star_search(problem)
+            if budget.exhausted:
+                return False
+            if not detour:
+                continue
+            # follow the detour to the plan, then the cells of the rest of the plan
+            moves = list(detour)
+            point, facing = snake_head_point, direction
+            for move in detour:
+                _, facing, dx, dy = facing.get_transitions()[move.value + 1]
+                point = point.move(dx, dy)
+            for _, location, _ in steps[rejoin + 1:]:
+                move = Plan.move_towards(point, facing, location)
+                _, facing, dx, dy = facing.get_transitions()[move.value + 1]
+                point = point.move(dx, dy)
+                moves.append(move)
+            repaired = Plan(snake_head_point, direction, moves, plan.version)
+            if Problem.is_safe(self.plan_end(board, repaired), budget, self.table, self.stats):
+                self.stats.plan_repairs += 1
+                self.plan = repaired
+                return True
+        return False
+
+    @staticmethod
+    def plan_end(board, plan):
+        """:return: The search node at the end of the plan, the snake having occupied every cell of the plan."""
+        state = SearchState(board)
+        for _, (x, y), _ in plan.steps:
+            state = state.occupy(x, y)
+        _, (x, y), direction = plan.steps[-1]
+        return Node(state, Point(x, y), direction, len(plan))
+
     def stall(self, board, direction):
         snake_head_point = self.board_items[GO.SNAKE_HEAD]
-        possible_moves = list(Problem.actions(Node(board, snake_head_point, direction, 0)))
+        possible_moves = list(Problem.actions(Node(SearchState(board), snake_head_point, direction, 0)))
         if self.prev_stall_move:
             move = self.prev_stall_move
             self.prev_stall_move = None
@@ -161,44 +665,97 @@ class Agent:
 
     @staticmethod
     def a_star_search(problem):
-        frontier = SortedListWithKey(key=lambda x: x.path_cost + Point.manhattan(x.snake_head, problem.target_location))
-        initial_state = copy.deepcopy(problem.initial_state)
-        frontier.add(initial_state)
-        explored = []
-        while True:
-            if len(frontier) == 0:
-                return False
-            node = frontier.pop(0)
+        """A* graph search over (snake head, direction) states. The frontier is a binary heap ordered by f-cost and
+        insertion order, stale heap entries are skipped by comparing against the best known path cost per state.
+        The heuristic of the problem guides the search, states from which it finds no goal reachable are pruned.
+        When the budget of the problem runs out, the path towards the expanded node with the lowest heuristic is
+        returned instead (and problem.budget.exhausted is set)."""
+        heuristic = problem.heuristic
+        initial_state = problem.initial_state
+        table = problem.table
+        stats = problem.stats
+        table_key = None
+        if table is not None and problem.table_key is not None:
+            # the result of the same search before: its path or False when no goal could be reached
+            table_key = (initial_state.state.occupancy, initial_state.snake_head.x, initial_state.snake_head.y,
+                         initial_state.direction, problem.table_key)
+            known_path = table.get(table_key)
+            if known_path is not None:
+                return list(known_path) if known_path else False
+        tie_breaker = itertools.count()
+        frontier = []
+        best_costs = {initial_state.key(): 0}
+        explored = set()
+        frontier_peak = 1
+        path = False
+        budget = problem.budget
+        estimate = heuristic(initial_state.snake_head)
+        if estimate is not None:
+            frontier.append((estimate, next(tie_breaker), initial_state))
+        closest = (estimate, initial_state)
+        stats.searches += 1
+        while frontier:
+            node = heapq.heappop(frontier)[2]
+            key = node.key()
+            if key in explored:
+                continue
             if problem.goal_test(node):
-                return node.moves
-            explored.append(node)
-            for move in problem.actions(node):
-                child = node.move(move)
-                if child not in explored and child not in frontier:
-                    frontier.add(child)
-                elif child in frontier:
-                    other_node = [n for n in frontier if n == child][0]
-                    if child < other_node:
-                        frontier.remove(other_node)
-                        frontier.add(child)
+                path = node.moves
+                break
+            if budget is not None:
+                if budget.exhausted or budget.spend():
+                    path = closest[1].moves
+                    break
+                distance = heuristic(node.snake_head)
+                if distance < closest[0]:
+                    closest = (distance, node)
+            explored.add(key)
+            stats.expansions += 1
+            for child in problem.successors(node):
+                child_key = child.key()
+                if child_key in explored or best_costs.get(child_key, child.path_cost + 1) <= child.path_cost:
+                    continue
+                # no goal can be reached from the child
+                estimate = heuristic(child.snake_head)
+                if estimate is None:
+                    continue
+                best_costs[child_key] = child.path_cost
+                heapq.heappush(frontier, (child.path_cost + estimate, next(tie_breaker), child))
+            frontier_peak = max(frontier_peak, len(frontier))
+        stats.frontier_peak = max(stats.frontier_peak, frontier_peak)
+        if table_key is not None and not (budget is not None and budget.exhausted):
+            table.put(table_key, tuple(path) if path else False)
+        return path
+
+    def clone(self):
+        """:return: An agent in the same state, which continues with the same plan independently of this agent. The
+        clone shares the TranspositionTable of this agent, so what one of them finds is reused by the other, and its
+        SearchStats, so the work of both is counted together."""
+        agent = copy.copy(self)
+        if self.plan:
+            agent.plan = self.plan.copy()
+        # only used during a call of get_move
+        agent.board_items = None
+        agent.problem = None
+        return agent
 
     def on_die(self):
         self.board_items = None
         self.problem = None
-        self.path = None
+        self.plan = None
         self.score = None
         self.prev_stall_move = None
 
     @staticmethod
     def scan_board(board):
-        board_items = {GO.SNAKE_BODY: [], GO.EMPTY: [], GO.WALL: [], GO.FOOD: [], GO.SNAKE_HEAD: None}
-        for x in range(Agent.board_width):
-            for y in range(Agent.board_height):
-                item = board[x][y]
-                location = Point(x, y)
-                if item == GO.SNAKE_HEAD:
-                    board_items[GO.SNAKE_HEAD] = location
-                    board_items[GO.SNAKE_BODY].append(location)
-                else:
-                    board_items[item].append(location)
+        if isinstance(board, BoardView):
+            # the view keeps the locations itself, only the head and the food are listed
+            return {GO.SNAKE_HEAD: Point(*board.head), GO.FOOD: [Point(x, y) for x, y in board.food]}
+        # only the head and the food are listed as well, the columns are searched with the list methods
+        board_items = {GO.FOOD: [], GO.SNAKE_HEAD: None}
+        for x, column in enumerate(board):
+            if GO.SNAKE_HEAD in column:
+                board_items[GO.SNAKE_HEAD] = Point(x, column.index(GO.SNAKE_HEAD))
+            if GO.FOOD in column:
+                board_items[GO.FOOD].extend(Point(x, y) for y, item in enumerate(column) if item == GO.FOOD)
         return board_items
@@ -0,0 +1,224 @@
+"""
+Array-backed boards, for evaluating agents offline on many games at once. A board is stored as a uint8 array in which
+every cell holds the value of its GameObject, indexed like the board array: array[x, y]. This module needs NumPy,
+which is optional: the game itself runs without it.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from gameobjects import GameObject
+from move import Direction
+from snake import DeathCause
+
+WALL = GameObject.WALL.value
+FOOD = GameObject.FOOD.value
+EMPTY = GameObject.EMPTY.value
+SNAKE_HEAD = GameObject.SNAKE_HEAD.value
+SNAKE_BODY = GameObject.SNAKE_BODY.value
+
+_GAME_OBJECTS = {game_object.value: game_object for game_object in GameObject}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("arrayboard needs NumPy, install it with: pip install numpy")
+
+
+def to_array(board):
+    """
+    Converts a board (a two dimensional array of GameObject, or a BoardView) to an array of GameObject values.
+
+    :return: A uint8 array with shape (width, height).
+    """
+    _require_numpy()
+    return np.array([[game_object.value for game_object in column] for column in board], dtype=np.uint8)
+
+
+def from_array(array):
+    """
+    Converts an array of GameObject values back to a board as handed to Agent.get_move.
+
+    :return: A two dimensional array (list of lists) of GameObject, accessed by board[x][y].
+    """
+    return [[_GAME_OBJECTS[value] for value in column] for column in array.tolist()]
+
+
+class BatchGame:
+    """
+    Plays a batch of independent games in lockstep, each step moves the snake of every game at once using vectorized
+    operations over (games, width, height) arrays. The rules are the same as in Snake.update.
+
+    The body of a snake is stored as the number of turns each cell stays occupied, which is decreased every turn:
+    the cell left by the head stays occupied as many turns as the score, and eating extends every body cell by a turn.
+    """
+
+    # x and y manipulations indexed by the value of a Direction
+    DX = (0, 1, 0, -1)
+    DY = (-1, 0, 1, 0)
+
+    def __init__(self, nr_games, board_width, board_height, max_nr_food, nr_walls, max_tics_to_starve=-1, seed=None):
+        _require_numpy()
+        self.nr_games = nr_games
+        self.width = board_width
+        self.height = board_height
+        self.max_nr_food = max_nr_food
+        self.nr_walls = nr_walls
+        self.max_tics_to_starve = max_tics_to_starve
+        self.rng = np.random.default_rng(seed)
+        self.dx = np.array(BatchGame.DX)
+        self.dy = np.array(BatchGame.DY)
+        self.games = np.arange(nr_games)
+
+        # walls and food of every game, the snakes are kept in the arrays below
+        self.grid = np.full((nr_games, board_width, board_height), EMPTY, dtype=np.uint8)
+        self.life = np.zeros((nr_games, board_width, board_height), dtype=np.int32)
+        self.x = np.zeros(nr_games, dtype=np.int64)
+        self.y = np.zeros(nr_games, dtype=np.int64)
+        self.direction = np.zeros(nr_games, dtype=np.int64)
+        self.score = np.zeros(nr_games, dtype=np.int64)
+        self.tics_alive = np.zeros(nr_games, dtype=np.int64)
+        self.tics_to_starve = np.zeros(nr_games, dtype=np.int64)
+        # the value of the DeathCause of every game, 0 while the snake is alive
+        self.death_cause = np.zeros(nr_games, dtype=np.uint8)
+        self.alive = np.zeros(nr_games, dtype=bool)
+        self.reset(np.ones(nr_games, dtype=bool))
+
+    def reset(self, games):
+        """
+        Starts a new game on the boards selected by the boolean mask games, with new walls and food.
+        """
+        self.grid[games] = EMPTY
+        self.life[games] = 0
+        self.direction[games] = Direction.NORTH.value
+        self.score[games] = 0
+        self.tics_alive[games] = 0
+        self.tics_to_starve[games] = self.max_tics_to_starve
+        self.death_cause[games] = 0
+        self.alive[games] = True
+        # the snake is placed first, like a Snake is created before its Board
+        self.x[games] = self.rng.integers(0, self.width, games.sum())
+        self.y[games] = self.rng.integers(0, self.height, games.sum())
+        self._spawn(games, WALL, self.nr_walls)
+        self._spawn(games, FOOD, self.max_nr_food)
+
+    def reset_finished(self):
+        """
+        Starts a new game on every board of which the snake died.
+        """
+        finished = ~self.alive
+        if finished.any():
+            self.reset(finished)
+
+    def observation(self):
+        """
+        :return: The boards as the agents see them, as a uint8 array with shape (games, width, height). The board of
+        a game that ended shows the state before its last move. Like Snake.update, the cell of the tail is shown as
+        free: it has a single turn left, and it is freed before the head moves.
+        """
+        observation = np.where(self.life > 1, np.uint8(SNAKE_BODY), self.grid)
+        inside = (self.x >= 0) & (self.x < self.width) & (self.y >= 0) & (self.y < self.height)
+        observation[self.games[inside], self.x[inside], self.y[inside]] = SNAKE_HEAD
+        return observation
+
+    def get_moves(self, agents):
+        """
+        Asks the agent of every game which is still alive for its next move, the agents get the same arguments as
+        from Snake.update.
+
+        :param agents: One agent per game.
+
+        :return: An array with the value of the Move of every game, 0 (straight) for the games which ended.
+        """
+        moves = np.zeros(self.nr_games, dtype=np.int64)
+        observation = self.observation()
+        for game in np.flatnonzero(self.alive):
+            move = agents[game].get_move(from_array(observation[game]), int(self.score[game]),
+                                         int(self.tics_alive[game]), int(self.tics_to_starve[game]),
+                                         Direction(int(self.direction[game])))
+            moves[game] = move.value
+        return moves
+
+    def step(self, moves):
+        """
+        Moves the snake of every game which is still alive.
+
+        :param moves: An array with the value of the Move (-1, 0 or 1) for every game.
+
+        :return: A boolean array telling which games ended during this step.
+        """
+        alive = self.alive.copy()
+
+        starved = alive & (self.tics_to_starve == 0)
+        self.death_cause[starved] = DeathCause.STARVATION.value
+        alive &= ~starved
+
+        # the body follows the head: every body cell gets a turn closer to being free and the cell the head leaves
+        # stays occupied for as many turns as the score
+        games = self.games[alive]
+        np.subtract(self.life, 1, out=self.life, where=(self.life > 0) & alive[:, None, None])
+        self.life[games, self.x[games], self.y[games]] = self.score[games]
+
+        self.direction[games] = (self.direction[games] + np.asarray(moves)[games]) % 4
+        self.x[games] += self.dx[self.direction[games]]
+        self.y[games] += self.dy[self.direction[games]]
+
+        x = self.x[games]
+        y = self.y[games]
+        outside = (x < 0) | (x >= self.width) | (y < 0) | (y >= self.height)
+        cell_x = np.clip(x, 0, self.width - 1)
+        cell_y = np.clip(y, 0, self.height - 1)
+        cell = self.grid[games, cell_x, cell_y]
+        wall = ~outside & (cell == WALL)
+        body = ~outside & ~wall & (self.life[games, cell_x, cell_y] > 0)
+        dead = outside | wall | body
+        self.death_cause[games[outside]] = DeathCause.OUT_OF_BOUNDS.value
+        self.death_cause[games[wall]] = DeathCause.WALL.value
+        self.death_cause[games[body]] = DeathCause.BODY.value
+        alive[games[dead]] = False
+
+        eating = games[~dead & (cell == FOOD)]
+        if len(eating):
+            self.grid[eating, self.x[eating], self.y[eating]] = EMPTY
+            self.score[eating] += 1
+            eaten = self.life[eating]
+            eaten[eaten > 0] += 1
+            self.life[eating] = eaten
+            if self.max_tics_to_starve != -1:
+                self.tics_to_starve[eating] = self.max_tics_to_starve + 1
+            eating_mask = np.zeros(self.nr_games, dtype=bool)
+            eating_mask[eating] = True
+            self._spawn(eating_mask, FOOD)
+
+        self.tics_alive[alive] += 1
+        if self.max_tics_to_starve != -1:
+            self.tics_to_starve[alive] -= 1
+
+        ended = self.alive & ~alive
+        self.alive = alive
+        return ended
+
+    def _spawn(self, games, game_object, count=1):
+        """
+        Places count game objects on uniformly random free cells of each selected game, as far as there are free
+        cells left.
+        """
+        selected = np.flatnonzero(games)
+        if count <= 0 or len(selected) == 0:
+            return
+        free = (self.grid[selected] == EMPTY) & (self.life[selected] == 0)
+        inside = (self.x[selected] >= 0) & (self.x[selected] < self.width) & \
+                 (self.y[selected] >= 0) & (self.y[selected] < self.height)
+        free[np.flatnonzero(inside), self.x[selected[inside]], self.y[selected[inside]]] = False
+        free = free.reshape(len(selected), -1)
+        count = min(count, free.shape[1])
+        # the count free cells with the highest random priority are taken
+        priorities = np.where(free, self.rng.random(free.shape), -1.0)
+        cells = np.argpartition(-priorities, count - 1, axis=1)[:, :count]
+        rows = np.repeat(np.arange(len(selected)), count)
+        cells = cells.ravel()
+        has_free_cell = priorities[rows, cells] >= 0
+        selected = selected[rows[has_free_cell]]
+        cells = cells[has_free_cell]
+        self.grid[selected, cells // self.height, cells % self.height] = game_object
@@ -0,0 +1,166 @@
+"""
+Runs an agent in a worker thread (or process), so a slow search does not block the thread of the game (and of the user
+interface). Every move has a deadline: when the agent did not decide in time, a fallback move is made according to
+the DeadlinePolicy. While the game draws and waits for the next turn, the worker already computes the move for the
+board as it is expected to be after the current move.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+from enum import Enum
+import time
+
+from agent import Agent, Node, Problem, SearchState
+from board import BoardView
+from gameobjects import GameObject as GO
+from move import Move
+
+
+class DeadlinePolicy(Enum):
+    # repeat the previous move if that is safe (the snake keeps turning in circles) or make any other safe move
+    REPEAT = 1
+    # let Agent.stall pick the move, which prefers going straight
+    STALL = 2
+
+
+def _decide(agent, arguments):
+    """Runs in the worker. The agent is returned as well, since a worker process works on a copy of it."""
+    return agent.get_move(*arguments), agent
+
+
+class AsyncAgent:
+    """
+    Wraps an agent (with a clone() method, like Agent) which computes its moves in a worker. Each computation runs on
+    a clone of the agent, which replaces the agent once its move has been made, so a computation that missed its
+    deadline does not change the agent.
+
+    By default the worker is a thread. A thread running a search holds the GIL, which delays the game thread by a few
+    milliseconds at a time; a ProcessPoolExecutor with a single worker avoids that, at the cost of sending the agent
+    to the process for every move.
+
+    After every move the agent speculates: it predicts the board of the next turn (the snake moved, nothing else
+    changed) and starts computing the next move. When the next board matches the prediction, the speculative move is
+    used, otherwise (for instance when new food appeared) the move is computed again. As long as no deadline is
+    missed, the agent makes exactly the moves of the wrapped agent.
+    """
+
+    def __init__(self, agent=None, deadline=0.05, policy=DeadlinePolicy.REPEAT, executor=None):
+        """
+        :param agent: The agent computing the moves. When None, a new Agent with a move budget of half the deadline: a
+        search which does not fit in the deadline misses it every turn, as the fallback moves spoil its plan.
+        :param deadline: The number of seconds to wait for a move.
+        :param policy: The DeadlinePolicy deciding the move when the deadline is missed.
+        :param executor: The concurrent.futures executor running the agent, it should have a single worker. A new
+        ThreadPoolExecutor when None.
+        """
+        self.agent = agent if agent is not None else Agent(move_budget=deadline / 2)
+        self.deadline = deadline
+        self.policy = policy
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+        # the computation in the worker: (future, arguments of get_move, whether it is speculative), the arguments are
+        # None when the result is no longer needed. None when the worker is idle.
+        self.pending = None
+        # the cells the snake occupies from tail to head, to predict the next board
+        self.body = deque()
+        self.last_move = None
+        self.staller = Agent()
+        self.deadline_misses = 0
+        self.speculation_hits = 0
+        self.speculation_misses = 0
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        """See Agent.get_move."""
+        # the worker gets a copy of every column, the caller may change the board after this call returns
+        grid = board.copy() if isinstance(board, BoardView) else [list(column) for column in board]
+        head = Agent.scan_board(board)[GO.SNAKE_HEAD]
+        self.body.append((head.x, head.y))
+        while len(self.body) > max(score, 1):
+            self.body.popleft()
+        arguments = (grid, score, turns_alive, turns_to_starve, direction)
+
+        end = time.perf_counter() + self.deadline
+        if self.pending is not None:
+            future, expected, speculative = self.pending
+            if speculative and self.matches(expected, arguments):
+                self.speculation_hits += 1
+            else:
+                if speculative:
+                    self.speculation_misses += 1
+                # the worker may still be busy with a move that is no longer needed
+                wait([future], max(0, end - time.perf_counter()))
+                self.pending = None if future.done() else (future, None, False)
+        if self.pending is None:
+            self.pending = (self.executor.submit(_decide, self.agent.clone(), arguments), arguments, False)
+
+        future, expected, _ = self.pending
+        move = None
+        if expected is not None:
+            try:
+                # an exception of the agent is raised here, like when the agent is called directly
+                move, agent = future.result(max(0, end - time.perf_counter()))
+            except TimeoutError:
+                pass
+        if move is None:
+            self.deadline_misses += 1
+            move = self.fallback_move(board, direction)
+        else:
+            self.agent = agent
+            self.pending = None
+            self.speculate(grid, score, turns_alive, turns_to_starve, direction, move)
+        self.last_move = move
+        return move
+
+    def fallback_move(self, board, direction):
+        """:return: The move according to the DeadlinePolicy."""
+        if self.policy == DeadlinePolicy.STALL:
+            self.staller.board_items = Agent.scan_board(board)
+            return self.staller.stall(board, direction)
+        head = Agent.scan_board(board)[GO.SNAKE_HEAD]
+        safe_moves = list(Problem.actions(Node(SearchState(board), head, direction, 0)))
+        if self.last_move in safe_moves:
+            return self.last_move
+        return safe_moves[0] if safe_moves else Move.STRAIGHT
+
+    def speculate(self, grid, score, turns_alive, turns_to_starve, direction, move):
+        """
+        Starts computing the move for the board as expected after the given move: the head moved and the tail
+        followed (or not, when the snake eats). Nothing is started when the move is fatal.
+        """
+        new_direction = direction.get_new_direction(move)
+        dx, dy = new_direction.get_xy_manipulation()
+        x, y = self.body[-1][0] + dx, self.body[-1][1] + dy
+        if not (0 <= x < len(grid) and 0 <= y < len(grid[0])) or grid[x][y] not in (GO.EMPTY, GO.FOOD):
+            return
+        eats = grid[x][y] == GO.FOOD
+        new_score = score + 1 if eats else score
+        body = list(self.body)[-score:] if score else []
+        new_body = (body + [(x, y)])[-new_score:] if new_score else []
+        expected = [column[:] for column in grid]
+        for cell_x, cell_y in set(body) | {self.body[-1]}:
+            expected[cell_x][cell_y] = GO.EMPTY
+        for cell_x, cell_y in new_body:
+            expected[cell_x][cell_y] = GO.SNAKE_BODY
+        expected[x][y] = GO.SNAKE_HEAD
+        if turns_to_starve != -1:
+            turns_to_starve -= 1
+        arguments = (expected, new_score, turns_alive + 1, turns_to_starve, new_direction)
+        self.pending = (self.executor.submit(_decide, self.agent.clone(), arguments), arguments, True)
+
+    @staticmethod
+    def matches(expected, arguments):
+        """
+        :return: True when the arguments of get_move are the expected ones. The turns to starve are not compared, they
+        cannot be predicted when the snake eats and the agent does not use them.
+        """
+        return expected[1:3] == arguments[1:3] and expected[4] == arguments[4] and expected[0] == arguments[0]
+
+    def on_die(self):
+        if self.pending is not None:
+            self.pending[0].cancel()
+        self.pending = None
+        self.body.clear()
+        self.last_move = None
+        self.agent.on_die()
+
+    def close(self):
+        """Stops the worker thread, after the computation in progress."""
+        self.executor.shutdown(wait=False)
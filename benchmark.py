@@ -0,0 +1,504 @@
+import argparse
+import itertools
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+from agent import Agent, Node, Point, Problem, SearchState, SearchStats, TranspositionTable
+from board import Board
+from gameobjects import GameObject
+from move import Direction, Move
+from snake import Snake
+
+
+def make_board(seed, width, height, nr_food, nr_walls, canvas_size=None):
+    """
+    Builds a seeded board with random walls, as used by the benchmarks.
+
+    :return: A (snake, board) tuple.
+    """
+    rng = random.Random(seed)
+    snake = Snake(width, height, -1, rng)
+    board = Board(width, height, canvas_size or width, canvas_size or height, snake, nr_food, nr_walls, False, rng)
+    return snake, board
+
+
+def repeat(function, min_time):
+    """
+    Calls function until at least min_time seconds have passed.
+
+    :return: A (calls, elapsed seconds) tuple.
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < min_time:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+def bench_astar(min_time):
+    """Expansions per second of Agent.a_star_search towards every food item on empty and walled boards."""
+    for size, nr_walls in ((25, 0), (25, 20), (50, 0), (50, 80)):
+        snake, board = make_board(1, size, size, 3, nr_walls)
+        grid = board.get_copy()
+        head = Point(snake.x, snake.y)
+        foods = [Point(x, y) for x in range(size) for y in range(size) if grid[x][y] == GameObject.FOOD]
+
+        stats = SearchStats()
+
+        def search_all():
+            for food in foods:
+                Agent.a_star_search(Problem(Node(SearchState(grid), head, Direction.NORTH, 0), food, stats=stats))
+
+        calls, elapsed = repeat(search_all, min_time)
+        print("astar {}x{} walls={:<3} {:>10.0f} expansions/s {:>8.2f} ms/search {:>8} nested searches avoided "
+              "({} cache hits)".format(size, size, nr_walls, stats.expansions / elapsed,
+                                       1000 * elapsed / (calls * len(foods)), stats.nested_searches_avoided,
+                                       stats.safety_cache_hits))
+
+
+def bench_food(min_time):
+    """Latency of a planning decision on a walled 50x50 board against the number of food items, searching all food
+    at once (Agent.get_move) versus one search per food item in order of Manhattan distance until one is safe. On the
+    enclosed board the snake is walled in away from all food, so no food item is safe."""
+    for layout in ("open", "enclosed"):
+        for nr_food in (1, 3, 10, 30, 100):
+            snake, board = make_board(1, 50, 50, 0, 250)
+            if layout == "enclosed":
+                for i in range(-5, 6):
+                    for x, y in ((snake.x + i, snake.y - 5), (snake.x + i, snake.y + 5),
+                                 (snake.x - 5, snake.y + i), (snake.x + 5, snake.y + i)):
+                        if 0 <= x < 50 and 0 <= y < 50:
+                            board.set_game_object_at(x, y, GameObject.WALL)
+            for _ in range(nr_food):
+                board.spawn_new_food()
+            view = board.get_view()
+            head = Point(snake.x, snake.y)
+            foods = sorted((Point(x, y) for x, y in view.food),
+                           key=lambda food: (Point.manhattan(head, food), food.x, food.y))
+
+            stats = SearchStats()
+
+            def decide():
+                Agent(stats=stats).get_move(view, 0, 0, -1, snake.direction)
+
+            def decide_per_food():
+                state = SearchState(view)
+                for food in foods:
+                    if Agent.a_star_search(Problem(Node(state, head, snake.direction, 0), food, stats=stats)):
+                        break
+
+            for mode, function in (("all", decide), ("per-food", decide_per_food)):
+                stats.reset()
+                calls, elapsed = repeat(function, min_time / 10)
+                print("food 50x50 {:<8} food={:<4} {:<8} {:>8.2f} ms/decision {:>8.0f} expansions/decision".format(
+                    layout, nr_food, mode, 1000 * elapsed / calls, stats.expansions / calls))
+
+
+class TimedAgent(Agent):
+    """Agent which records the latency of every call to get_move."""
+
+    def __init__(self, latencies, **kwargs):
+        super().__init__(**kwargs)
+        self.latencies = latencies
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        start = time.perf_counter()
+        move = super().get_move(board, score, turns_alive, turns_to_starve, direction)
+        self.latencies.append(time.perf_counter() - start)
+        return move
+
+
+def bench_budget(min_time):
+    """Worst-case latency of Agent.get_move per turn on a crowded 100x100 board, with and without a move budget."""
+    from headless import GameSettings, play_game
+    from profiler import percentile
+    settings = GameSettings(board_width=100, board_height=100, food_blocks_max=10, wall_blocks_max=3000,
+                            test_config=False)
+    for move_budget in (None, 0.02, 0.005):
+        latencies = []
+        stats = SearchStats()
+        start = time.perf_counter()
+        games = 0
+        while time.perf_counter() - start < min_time:
+            play_game(games, 300, settings, agent=TimedAgent(latencies, move_budget=move_budget, stats=stats))
+            games += 1
+        print("budget {:<6} {:>8.2f}ms p50 {:>8.2f}ms p99 {:>8.2f}ms max {:>6} overruns in {} turns".format(
+            "none" if move_budget is None else "{:g}ms".format(1000 * move_budget),
+            1000 * percentile(latencies, 0.5), 1000 * percentile(latencies, 0.99), 1000 * max(latencies),
+            stats.budget_overruns, len(latencies)))
+
+
+def bench_async(min_time):
+    """Time the game thread is blocked per turn (as in a frame of main.py) and the lateness of the turns, on a crowded
+    100x100 board at 30 turns per second, for the agent in the game thread and for an AsyncAgent."""
+    from asyncagent import AsyncAgent, DeadlinePolicy
+    from concurrent.futures import ProcessPoolExecutor
+    from headless import GameSettings, new_game
+    from profiler import percentile
+    settings = GameSettings(board_width=100, board_height=100, food_blocks_max=10, wall_blocks_max=3000,
+                            test_config=False)
+    period = 1 / 30
+    agents = [("sync", lambda: Agent()), ("sync budget=20ms", lambda: Agent(move_budget=0.02)),
+              ("async 20ms", lambda: AsyncAgent(deadline=0.02)),
+              ("async 2ms repeat", lambda: AsyncAgent(deadline=0.002, policy=DeadlinePolicy.REPEAT)),
+              ("async 2ms stall", lambda: AsyncAgent(deadline=0.002, policy=DeadlinePolicy.STALL)),
+              ("async 2ms process", lambda: AsyncAgent(deadline=0.002, executor=ProcessPoolExecutor(1)))]
+    for name, make_agent in agents:
+        agent = make_agent()
+        snake, board = new_game(1, settings, agent)
+        blocked = []
+        lateness = []
+        start = time.perf_counter()
+        next_turn = start
+        while time.perf_counter() - start < min_time:
+            lateness.append(max(0.0, time.perf_counter() - next_turn))
+            turn_start = time.perf_counter()
+            if snake.update(board):
+                snake, board = new_game(len(blocked), settings, agent)
+            blocked.append(time.perf_counter() - turn_start)
+            # the rest of the period the user interface draws and waits, and an AsyncAgent keeps computing
+            next_turn += period
+            time.sleep(max(0.0, next_turn - time.perf_counter()))
+        print("async {:<17} {:>5} turns blocked {:>7.2f}ms p50 {:>7.2f}ms p99 {:>7.2f}ms max, late {:>7.2f}ms p99 "
+              "{:>7.2f}ms max, score {}".format(name, len(blocked), 1000 * percentile(blocked, 0.5),
+                                                1000 * percentile(blocked, 0.99), 1000 * max(blocked),
+                                                1000 * percentile(lateness, 0.99), 1000 * max(lateness), snake.score),
+              end="")
+        if isinstance(agent, AsyncAgent):
+            print(", {} deadline misses, {} speculation hits, {} misses".format(
+                agent.deadline_misses, agent.speculation_hits, agent.speculation_misses), end="")
+            agent.close()
+        print()
+
+
+def bench_batch(min_time):
+    """Transitions per second of arrayboard.BatchGame with random moves, restarting the games that ended."""
+    import arrayboard
+    if arrayboard.np is None:
+        print("batch skipped, NumPy is not installed")
+        return
+    for nr_games in (1, 64, 1024, 4096):
+        game = arrayboard.BatchGame(nr_games, 25, 25, 3, 10, seed=1)
+        rng = arrayboard.np.random.default_rng(1)
+
+        def step():
+            game.step(rng.integers(-1, 2, nr_games))
+            game.reset_finished()
+
+        calls, elapsed = repeat(step, min_time)
+        print("batch 25x25 games={:<5} {:>12.0f} transitions/s".format(nr_games, calls * nr_games / elapsed))
+
+
+def bench_scaling(min_time):
+    """Latency of a planning decision of the agent (Agent.get_move without a cached path) against the board area."""
+    for size in (25, 50, 100, 200, 500):
+        snake, board = make_board(1, size, size, 3, size * size // 100)
+        view = board.get_view()
+
+        def decide():
+            Agent().get_move(view, 0, 0, -1, snake.direction)
+
+        calls, elapsed = repeat(decide, min_time)
+        print("scaling {}x{} area={:<7} {:>10.2f} ms/decision".format(size, size, size * size, 1000 * elapsed / calls))
+
+
+def bench_trail(min_time):
+    """Time per search node of SearchState.occupy and SearchState.get against the board area: deriving the state of a
+    child node and looking up a cell should not depend on the size of the board."""
+    for size in (25, 100, 200, 500):
+        snake, board = make_board(1, size, size, 0, 0)
+        state = SearchState(board.get_view())
+        # a trail of 200 cells spread over the board, like a long path of a search
+        rng = random.Random(1)
+        cells = [(rng.randrange(size), rng.randrange(size)) for _ in range(200)]
+        for x, y in cells:
+            state = state.occupy(x, y)
+        seconds = []
+        for statement, (x, y) in (("state.occupy(x, y)", (size // 2, size // 3)), ("state.get(x, y)", cells[0])):
+            timer = timeit.Timer(statement, globals={"state": state, "x": x, "y": y})
+            number, _ = timer.autorange()
+            runs = max(1, int(min_time / 8 / timer.timeit(number) * number))
+            seconds.append(min(timer.repeat(5, max(1, runs // 5))) / max(1, runs // 5))
+        print("trail {}x{} area={:<7} {:>8.0f} ns/occupy {:>8.0f} ns/get".format(
+            size, size, size * size, 1e9 * seconds[0], 1e9 * seconds[1]))
+
+
+def bench_replan(min_time):
+    """Replans, plan repairs and latency of the agent on a 25x25 board on which a new wall appears every few turns,
+    next to the path of the snake or anywhere on the board."""
+    for placement in ("anywhere", "on path"):
+        snake, board = make_board(1, 25, 25, 3, 0)
+        agent = TimedAgent([])
+        snake.agent = agent
+        rng = random.Random(1)
+        start = time.perf_counter()
+        turns = 0
+        while time.perf_counter() - start < min_time and turns < 5000:
+            if turns % 5 == 0:
+                if placement == "anywhere":
+                    board.spawn_wall()
+                elif agent.plan and len(agent.plan) > 2:
+                    _, (x, y), _ = list(agent.plan.steps)[rng.randrange(1, len(agent.plan))]
+                    if board.get_game_object_at(x, y) == GameObject.EMPTY:
+                        board.set_game_object_at(x, y, GameObject.WALL)
+            turns += 1
+            if snake.update(board):
+                snake, board = make_board(turns, 25, 25, 3, 0)
+                snake.agent = agent
+        stats = agent.stats
+        print("replan {:<8} {:>6} turns {:>6} replans {:>6} repairs {:>6} revalidations {:>8.3f} ms/turn".format(
+            placement, turns, stats.replans, stats.plan_repairs, stats.plan_revalidations,
+            1000 * sum(agent.latencies) / len(agent.latencies)))
+
+
+def bench_table(min_time):
+    """Hit rate, size of the transposition table of the agent and the latency of its decisions against the capacity
+    of the table (0 disables it), for an agent which plans again after a food item appeared (the occupancy of the
+    board is unchanged, so the safety checks are shared), for an agent playing games (the tail moves every turn, so
+    the table hardly hits) and for an AsyncAgent playing games: its speculative decisions miss when new food appears,
+    and the decision made again then shares the safety checks with them."""
+    from asyncagent import AsyncAgent
+    from headless import GameSettings, new_game
+    settings = GameSettings(board_width=50, board_height=50, food_blocks_max=10, wall_blocks_max=250,
+                            test_config=False)
+    for capacity in (0, 1000, 10000):
+        snake, board = make_board(1, 50, 50, 30, 250)
+
+        def decide_new_food(agent):
+            x, y = board.get_free_xy()
+            board.set_game_object_at(x, y, GameObject.FOOD)
+            agent.on_die()
+            agent.get_move(board.get_view(), 0, 0, -1, snake.direction)
+            board.set_game_object_at(x, y, GameObject.EMPTY)
+
+        def play_games(agent, end):
+            for seed in itertools.count():
+                game_snake, game_board = new_game(seed, settings, agent)
+                for _ in range(300):
+                    if game_snake.update(game_board) or time.perf_counter() > end:
+                        break
+                agent.on_die()
+                if time.perf_counter() > end:
+                    return
+
+        for scenario in ("new food", "game", "async"):
+            table = TranspositionTable(capacity)
+            latencies = []
+            agent = TimedAgent(latencies, table=table)
+            end = time.perf_counter() + min_time / 3
+            if scenario == "new food":
+                while time.perf_counter() < end:
+                    decide_new_food(agent)
+            elif scenario == "game":
+                play_games(agent, end)
+            else:
+                # a deadline the agent does not miss, the worker runs the clones of agent which share its table
+                async_agent = AsyncAgent(agent, deadline=1)
+                play_games(async_agent, end)
+                async_agent.close()
+            print("table capacity={:<6} {:<9} {:>6.1%} hit rate {:>6} entries {:>7.0f} kB {:>6} decisions {:>8.3f} "
+                  "ms/decision".format(capacity, scenario, table.hit_rate(), len(table.entries), table.memory() / 1024,
+                                       len(latencies), 1000 * sum(latencies) / len(latencies)))
+
+
+def bench_hamilton(min_time):
+    """Scores and latency per move of the A* agent and the Hamiltonian cycle agent over seeded games, on a small board
+    that the cycle agent can fill and on the default board of main.py."""
+    from hamilton import HamiltonAgent
+    from headless import GameSettings, game_seeds, new_game
+    for settings, max_turns in ((GameSettings(12, 12, 1, 0, False), 5000), (GameSettings(), 10000)):
+        for name, agent_class in (("astar", Agent), ("hamilton", HamiltonAgent)):
+            scores = []
+            turns = 0
+            start = time.perf_counter()
+            for seed in game_seeds(0, 1000):
+                snake, board = new_game(seed, settings, agent_class())
+                for _ in range(max_turns):
+                    if snake.update(board):
+                        break
+                scores.append(snake.score)
+                turns += snake.tics_alive
+                if time.perf_counter() - start > min_time:
+                    break
+            elapsed = time.perf_counter() - start
+            print("hamilton {}x{} {:<8} {:>4} games {:>8.1f} mean score {:>5} max score {:>8.3f} ms/move".format(
+                settings.board_width, settings.board_height, name, len(scores), sum(scores) / len(scores),
+                max(scores), 1000 * elapsed / turns))
+
+
+def serpentine_cycle(width, height):
+    """
+    Builds a Hamiltonian cycle over a board with an even height: along the top row, zigzag down through the other
+    rows (leaving the first column free) and back up the first column.
+
+    :return: A list of (x, y) cells in the order of the cycle.
+    """
+    if height % 2 == 1:
+        raise ValueError("the serpentine cycle needs an even height, got {}x{}".format(width, height))
+    cycle = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 == 1 else range(1, width)
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((0, y) for y in range(height - 1, 0, -1))
+    return cycle
+
+
+class CycleAgent:
+    """Agent which follows a fixed cycle, used to benchmark the engine without the cost of a search."""
+
+    def __init__(self, snake, cycle):
+        self.snake = snake
+        self.next_cell = {cell: cycle[(i + 1) % len(cycle)] for i, cell in enumerate(cycle)}
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        next_x, next_y = self.next_cell[(self.snake.x, self.snake.y)]
+        for move, _, dx, dy in direction.get_transitions():
+            if (self.snake.x + dx, self.snake.y + dy) == (next_x, next_y):
+                return move
+        return None
+
+    def on_die(self):
+        pass
+
+
+def make_long_snake(size, length, canvas_size=None):
+    """
+    Builds a food-less size x size board (size must be even) with a snake of the given length lying on a serpentine
+    cycle, controlled by a CycleAgent.
+
+    :return: A (snake, board) tuple.
+    """
+    snake, board = make_board(1, size, size, 0, 0, canvas_size)
+    cycle = serpentine_cycle(size, size)
+    snake.agent = CycleAgent(snake, cycle)
+    changed_cells = [(snake.x, snake.y)] + cycle[:length + 1]
+    snake.x, snake.y = cycle[length]
+    # the snake came from its neck, the cell before the head on the cycle
+    neck_x, neck_y = cycle[length - 1]
+    snake.direction = next(direction for direction in Direction
+                           if direction.get_xy_manipulation() == (snake.x - neck_x, snake.y - neck_y))
+    for x, y in cycle[:length]:
+        snake.push_body_part(x, y)
+    # the snapshot of the board (and so its views) must show the body, as it would after playing the turns
+    for x, y in changed_cells:
+        board.refresh_cell(x, y)
+    return snake, board
+
+
+def bench_spawn(min_time):
+    """Cost of picking a random free cell (Board.get_free_xy) on a 100x100 board against the fraction covered by
+    walls."""
+    for fill in (0.0, 0.5, 0.9, 0.99, 0.999):
+        start = time.perf_counter()
+        snake, board = make_board(1, 100, 100, 0, int(fill * 100 * 100))
+        setup = time.perf_counter() - start
+        calls, elapsed = repeat(board.get_free_xy, min_time)
+        print("spawn 100x100 fill={:<6} {:>8.2f} us/spawn {:>8.2f} s to place the walls".format(
+            fill, 1e6 * elapsed / calls, setup))
+
+
+def bench_snake(min_time):
+    """Ticks per second of Snake.update for growing snake lengths on a 50x50 board, excluding the agent."""
+    for length in (1, 10, 100, 500, 1000):
+        snake, board = make_long_snake(50, length)
+
+        def tick():
+            if snake.update(board):
+                raise RuntimeError("the benchmark snake died: {}".format(snake.death_cause))
+
+        calls, elapsed = repeat(tick, min_time)
+        print("snake 50x50 length={:<5} {:>10.0f} ticks/s".format(length, calls / elapsed))
+
+
+def bench_render(min_time):
+    """Frames and ticks per second of the Tk user interface, redrawing every cell versus only the changed cells."""
+    import tkinter
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError as error:
+        print("render skipped, no display available: {}".format(error))
+        return
+    canvas = tkinter.Canvas(root, width=800, height=800)
+    canvas.pack()
+    # a serpentine cycle needs an even size
+    for size in (24, 50, 100):
+        for mode, tics_per_frame in (("full", 1), ("dirty", 1), ("dirty", 10)):
+            canvas.delete("all")
+            snake, board = make_long_snake(size, size, 800)
+            board.draw_all(canvas)
+            draw = board.draw_all if mode == "full" else board.draw
+
+            def frame():
+                for _ in range(tics_per_frame):
+                    if snake.update(board):
+                        raise RuntimeError("the benchmark snake died: {}".format(snake.death_cause))
+                draw(canvas)
+                root.update()
+
+            calls, elapsed = repeat(frame, min_time)
+            print("render {}x{} {:<5} tics/frame={:<3} {:>8.1f} frames/s {:>8.1f} ticks/s".format(
+                size, size, mode, tics_per_frame, calls / elapsed, calls * tics_per_frame / elapsed))
+    root.destroy()
+
+
+def bench_startup(min_time):
+    """Cold start of a new Python process importing the game modules, as paid by every worker process started by
+    spawning, compared to an empty Python process."""
+    for statement in ("pass", "import game", "import headless", "import main", "import tkinter"):
+        durations = []
+        start = time.perf_counter()
+        while time.perf_counter() - start < min_time / 5 or len(durations) < 3:
+            started_at = time.perf_counter()
+            subprocess.run([sys.executable, "-c", statement], check=True)
+            durations.append(time.perf_counter() - started_at)
+        print("startup {:<16} {:>8.1f} ms (fastest of {})".format(statement, 1000 * min(durations), len(durations)))
+
+
+def bench_geometry(min_time):
+    """Per-call cost of the movement helpers and points used for every node of a search."""
+    namespace = {"direction": Direction.WEST, "move": Move.RIGHT, "point": Point(3, 4), "other": Point(3, 4)}
+    statements = ["direction.get_new_direction(move)", "direction.get_xy_manipulation()", "direction.get_xy_moves()",
+                  "direction.get_transitions()", "point.move(1, 0)", "point == other", "hash(point)"]
+    for statement in statements:
+        timer = timeit.Timer(statement, globals=namespace)
+        number, _ = timer.autorange()
+        runs = max(1, int(min_time / len(statements) / timer.timeit(number) * number))
+        print("geometry {:<36} {:>8.0f} ns/call".format(statement, 1e9 * timer.timeit(runs) / runs))
+
+
+BENCHMARKS = {
+    "astar": bench_astar,
+    "async": bench_async,
+    "batch": bench_batch,
+    "budget": bench_budget,
+    "food": bench_food,
+    "geometry": bench_geometry,
+    "hamilton": bench_hamilton,
+    "render": bench_render,
+    "replan": bench_replan,
+    "scaling": bench_scaling,
+    "snake": bench_snake,
+    "spawn": bench_spawn,
+    "startup": bench_startup,
+    "table": bench_table,
+    "trail": bench_trail,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the snake benchmarks.")
+    parser.add_argument("benchmarks", nargs="*", choices=sorted(BENCHMARKS), help="defaults to all benchmarks")
+    parser.add_argument("--min-time", type=float, default=2.0, help="minimal seconds spent in each measurement")
+    args = parser.parse_args()
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        BENCHMARKS[name](args.min_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,156 @@
-from random import randint
+from collections import deque
+import functools
+from itertools import count, islice
+import random
 from gameobjects import *
 
+# the game objects the snake can move onto
+_PASSABLE = (GameObject.EMPTY, GameObject.FOOD)
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_keys(width, height):
+    """
+    :return: A random 64 bit key per cell id (x * height + y), the same for every board of the given size. The
+    Zobrist hash of the occupancy of a board is the XOR of the keys of the cells which are not EMPTY or FOOD.
+    """
+    rng = random.Random("zobrist {}x{}".format(width, height))
+    return [rng.getrandbits(64) for _ in range(width * height)]
+
+
+def occupancy_hash(board):
+    """:return: The Zobrist hash of the occupancy of a board array (or view), see zobrist_keys."""
+    height = len(board[0])
+    keys = zobrist_keys(len(board), height)
+    occupancy = 0
+    for x, column in enumerate(board):
+        for y, game_object in enumerate(column):
+            if game_object not in _PASSABLE:
+                occupancy ^= keys[x * height + y]
+    return occupancy
+
+
+class BoardFullError(RuntimeError):
+    """Raised when a game object is placed at a random free cell, but every cell of the board is taken."""
+
+
+# the walls of the test setup (see the test_config setting in main.py), at fixed cells of the default 25x25 board
+TEST_WALLS = [(7, 5), (15, 8)]
+
+# the numbers of the wall layouts of all boards, see BoardView.wall_layout
+_wall_layouts = count()
+
+
+class BoardView:
+    """
+    Read-only view on the current state of a Board, this is what the agent receives every turn. It is indexed like a
+    two dimensional board array (view[x][y]) and it also exposes the indexes kept by the board, so the agent does not
+    need to scan the board. The view always shows the current state of the board, its columns are tuples so the board
+    cannot be modified through the view, use copy() to get a board array that can be modified.
+    """
+
+    def __init__(self, board):
+        self._board = board
+
+    def __getitem__(self, x):
+        board = self._board
+        column = board.columns[x]
+        if column is None:
+            column = board.columns[x] = tuple(board.snapshot[x])
+        return column
+
+    def __len__(self):
+        return self._board.width
+
+    def __iter__(self):
+        return (self[x] for x in range(self._board.width))
+
+    @property
+    def width(self):
+        return self._board.width
+
+    @property
+    def height(self):
+        return self._board.height
+
+    @property
+    def version(self):
+        """A number which is increased every time a cell of the board changes."""
+        return self._board.version
+
+    def changes_since(self, version):
+        """
+        :return: The (x, y) locations of the cells which changed since the given version (possibly with duplicates), or
+        None when the board no longer remembers all of these changes.
+        """
+        return self._board.changes_since(version)
+
+    @property
+    def head(self):
+        """The (x, y) location of the head of the snake."""
+        return self._board.snake.x, self._board.snake.y
+
+    @property
+    def food(self):
+        """The set of (x, y) locations of the food, must not be modified."""
+        return self._board.food
+
+    @property
+    def walls(self):
+        """The set of (x, y) locations of the walls, must not be modified."""
+        return self._board.walls
+
+    @property
+    def wall_layout(self):
+        """A number identifying the walls of the board: it changes whenever a wall appears or disappears, and no other
+        board (in this process) has the same number."""
+        return self._board.wall_layout
+
+    @property
+    def occupancy_hash(self):
+        """The Zobrist hash of the cells which are not EMPTY or FOOD, see zobrist_keys."""
+        return self._board.occupancy_hash
+
+    def copy(self):
+        return self._board.get_copy()
+
 
 class Board:
 
     max_random_tries = 5
 
-    def __init__(self, board_width, board_height, canvas_width, canvas_height, snake, max_nr_food, nr_walls, test_config):
+    def __init__(self, board_width, board_height, canvas_width, canvas_height, snake, max_nr_food, nr_walls, test_config,
+                 rng=None):
         self.snake = snake
+        # source of every random decision of the board, the random module itself unless a seeded Random is given
+        self.rng = rng if rng is not None else random
         self.width = board_width
         self.height = board_height
-        self.board = [[GameObject.EMPTY for x in range(board_width)] for y in range(board_height)]
+        self.board = [[GameObject.EMPTY for y in range(board_height)] for x in range(board_width)]
+        self.food = set()
+        self.walls = set()
+        # the board as seen by the agent (including the snake), kept up to date by refresh_cell()
+        self.snapshot = [[self.get_game_object_at(x, y) for y in range(board_height)] for x in range(board_width)]
+        # the columns of the snapshot as handed out by the view: tuples, built when a column is read for the first time
+        # after it changed, None until then
+        self.columns = [None] * board_width
+        # the empty cells of the snapshot in no particular order, with the index of every cell in free_cells, so a
+        # cell can be added, removed (by swapping it with the last cell) and picked at random in O(1)
+        self.free_cells = [(x, y) for x in range(board_width) for y in range(board_height)
+                           if self.snapshot[x][y] == GameObject.EMPTY]
+        self.free_index = {cell: i for i, cell in enumerate(self.free_cells)}
+        self.zobrist_keys = zobrist_keys(board_width, board_height)
+        self.occupancy_hash = occupancy_hash(self.snapshot)
+        # identifies the current walls, see BoardView.wall_layout
+        self.wall_layout = next(_wall_layouts)
+        self.version = 0
+        # the locations of the most recent changes of the snapshot, the last one being the change to self.version
+        self.changes = deque(maxlen=board_width * board_height)
+        self.view = BoardView(self)
+        # the rectangles on the canvas per cell, created by draw_all()
+        self.canvas = None
+        self.canvas_items = None
+        self.drawn_version = None
         self.block_width = canvas_width / board_width
         self.block_height = canvas_height / board_height
         self.max_nr_food = max_nr_food
@@ -19,8 +159,8 @@ class Board:
             for i in range(nr_walls):
                 self.spawn_wall()
         else:
-            self.set_game_object_at(7, 5, GameObject.WALL)
-            self.set_game_object_at(15, 8, GameObject.WALL)
+            for x, y in TEST_WALLS:
+                self.set_game_object_at(x, y, GameObject.WALL)
 
         for i in range(max_nr_food):
             self.spawn_new_food()
@@ -38,26 +178,91 @@ class Board:
         return self.board[x][y] == GameObject.WALL
 
     def set_game_object_at(self, x, y, game_object):
+        if ((x, y) in self.walls) != (game_object == GameObject.WALL):
+            self.wall_layout = next(_wall_layouts)
+        for game_object_type, locations in ((GameObject.FOOD, self.food), (GameObject.WALL, self.walls)):
+            if game_object == game_object_type:
+                locations.add((x, y))
+            else:
+                locations.discard((x, y))
         self.board[x][y] = game_object
+        self.refresh_cell(x, y)
+
+    def refresh_cell(self, x, y):
+        """
+        Updates the snapshot of the board at the given location. Must be called for every cell of which the game
+        object changed, including the cells the snake entered or left.
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            game_object = self.get_game_object_at(x, y)
+            previous = self.snapshot[x][y]
+            if previous != game_object:
+                self.snapshot[x][y] = game_object
+                self.columns[x] = None
+                self.version += 1
+                self.changes.append((x, y))
+                if (previous in _PASSABLE) != (game_object in _PASSABLE):
+                    self.occupancy_hash ^= self.zobrist_keys[x * self.height + y]
+                if previous == GameObject.EMPTY:
+                    index = self.free_index.pop((x, y))
+                    last = self.free_cells.pop()
+                    if index < len(self.free_cells):
+                        self.free_cells[index] = last
+                        self.free_index[last] = index
+                elif game_object == GameObject.EMPTY:
+                    self.free_index[(x, y)] = len(self.free_cells)
+                    self.free_cells.append((x, y))
+
+    def changes_since(self, version):
+        nr_changes = self.version - version
+        if nr_changes > len(self.changes):
+            return None
+        return list(islice(self.changes, len(self.changes) - nr_changes, None))
 
     def draw(self, canvas):
+        """
+        Draws the board on the canvas. The rectangles of the cells are created once, afterwards only the cells which
+        changed since the previous call are recolored.
+        """
+        changes = None
+        if canvas is self.canvas and self.drawn_version is not None:
+            changes = self.changes_since(self.drawn_version)
+        if changes is None:
+            self.draw_all(canvas)
+            return
+        for x, y in set(changes):
+            canvas.itemconfig(self.canvas_items[x][y], fill=self.snapshot[x][y].getColor())
+        self.drawn_version = self.version
+
+    def draw_all(self, canvas):
+        """
+        Draws the board on the canvas from scratch, replacing the rectangles drawn earlier.
+        """
+        if canvas is self.canvas:
+            for column in self.canvas_items:
+                canvas.delete(*column)
+        self.canvas = canvas
+        self.canvas_items = []
         for x in range(0, self.width):
+            column = []
             for y in range(0, self.height):
                 draw_x = x * self.block_width
                 draw_y = y * self.block_height
-                canvas.create_rectangle(draw_x, draw_y, draw_x + self.block_width, draw_y + self.block_height,
-                                        fill=self.get_game_object_at(x, y).getColor(), outline="")
+                column.append(canvas.create_rectangle(draw_x, draw_y, draw_x + self.block_width,
+                                                      draw_y + self.block_height,
+                                                      fill=self.snapshot[x][y].getColor(), outline=""))
+            self.canvas_items.append(column)
+        self.drawn_version = self.version
 
     def eat_food(self, x, y):
-        self.board[x][y] = GameObject.EMPTY
+        self.set_game_object_at(x, y, GameObject.EMPTY)
         self.spawn_new_food()
 
+    def get_view(self):
+        return self.view
+
     def get_copy(self):
-        copy = [[GameObject.EMPTY for x in range(self.width)] for y in range(self.height)]
-        for x in range(self.width):
-            for y in range(self.height):
-                copy[x][y] = self.get_game_object_at(x, y)
-        return copy
+        return [column[:] for column in self.snapshot]
 
     def spawn_new_food(self):
         self.spawn_random_object(GameObject.FOOD)
@@ -70,26 +275,20 @@ class Board:
         self.set_game_object_at(new_x, new_y, gameObjectType)
 
     def get_free_xy(self):
-        new_x = randint(0, self.width - 1)
-        new_y = randint(0, self.height - 1)
+        new_x = self.rng.randint(0, self.width - 1)
+        new_y = self.rng.randint(0, self.height - 1)
         count = 0
         # try to find a random position
-        while not (self.get_game_object_at(new_x, new_y) == GameObject.EMPTY) and count < self.max_random_tries:
+        while not (self.snapshot[new_x][new_y] == GameObject.EMPTY) and count < self.max_random_tries:
             count += 1
-            new_x = randint(0, self.width - 1)
-            new_y = randint(0, self.height - 1)
-
-        # if no random position could be guessed, try a more decent approach
-        if not self.get_game_object_at(new_x, new_y) == GameObject.EMPTY:
-            available = []
-            for x in range(self.width):
-                for y in range(self.height):
-                    if self.get_game_object_at(x, y) == GameObject.EMPTY:
-                        available.append((x, y))
-
-            if len(available) == 0:
-                raise RuntimeError("Congratulations, you broke the game by filling each cell of the board!")
+            new_x = self.rng.randint(0, self.width - 1)
+            new_y = self.rng.randint(0, self.height - 1)
+
+        # if no random position could be guessed, pick one of the free cells
+        if not self.snapshot[new_x][new_y] == GameObject.EMPTY:
+            if len(self.free_cells) == 0:
+                raise BoardFullError("Congratulations, you broke the game by filling each cell of the board!")
             else:
-                new_x, new_y = available[randint(0, len(available) - 1)]
+                new_x, new_y = self.free_cells[self.rng.randint(0, len(self.free_cells) - 1)]
 
         return new_x, new_y
@@ -0,0 +1,227 @@
+"""
+The game without its window: the settings, setting up a game and playing it turn by turn. Nothing here needs Tk or a
+display, so the headless tools and worker processes can use it, see main.py for the window.
+
+The settings can be read from a JSON file with a section per kind of settings, every section and setting being
+optional, e.g. {"game": {"board_width": 30, "test_config": false}, "agent": {"move_budget": 0.05}}.
+"""
+from collections import namedtuple
+import random
+import time
+
+from agent import Agent
+from board import TEST_WALLS, Board
+from hamilton import HamiltonAgent
+from snake import Snake
+
+# Settings of a single game, the defaults are the settings of the game window
+GameSettings = namedtuple('GameSettings', ['board_width', 'board_height', 'food_blocks_max', 'wall_blocks_max',
+                                           'test_config', 'starvation_tics'])
+GameSettings.__new__.__defaults__ = (25, 25, 3, 2, True, -1)
+
+# Settings of the agent. agent is a name in AGENTS, move_budget the maximum number of seconds the agent may think
+# about a single move (None for unlimited), deadline the maximum number of seconds to wait for a move of the agent,
+# which then thinks in a background thread (None to let it think in the game thread), and deadline_policy the name
+# of the asyncagent.DeadlinePolicy deciding the move when the deadline is missed.
+AgentSettings = namedtuple('AgentSettings', ['agent', 'move_budget', 'deadline', 'deadline_policy'])
+AgentSettings.__new__.__defaults__ = ("astar", None, None, "REPEAT")
+
+# Settings of the game window. At more turns per second than max_frames_per_second, multiple turns are played per
+# redraw.
+WindowSettings = namedtuple('WindowSettings', ['canvas_width', 'canvas_height', 'tics_per_second',
+                                               'max_frames_per_second'])
+WindowSettings.__new__.__defaults__ = (800, 800, 4, 60)
+
+# The settings of the game window, all sections of a config file: (name of the section, settings)
+CONFIG_SECTIONS = [("game", GameSettings()), ("agent", AgentSettings(move_budget=0.1)), ("window", WindowSettings())]
+
+# The agents that can be selected by name
+AGENTS = {"astar": Agent, "hamilton": HamiltonAgent}
+
+# The valid values of the settings which only take a few values, checked when parsing the command line
+SETTING_CHOICES = {"agent": sorted(AGENTS), "deadline_policy": ["REPEAT", "STALL"]}
+
+
+def new_game(seed, settings=GameSettings(), agent=None):
+    """
+    Sets up a game of which every random decision is taken from a Random seeded with the given seed.
+
+    :param agent: The agent controlling the snake, a new Agent when None.
+
+    :return: A (snake, board) tuple.
+    """
+    rng = random.Random(seed)
+    snake = Snake(settings.board_width, settings.board_height, settings.starvation_tics, rng, agent)
+    board = Board(settings.board_width, settings.board_height, settings.board_width, settings.board_height, snake,
+                  settings.food_blocks_max, settings.wall_blocks_max, settings.test_config, rng)
+    return snake, board
+
+
+def make_agent(settings=AgentSettings()):
+    """:return: A new agent according to the AgentSettings."""
+    if settings.agent not in AGENTS:
+        raise ValueError("unknown agent '{}', expected one of {}".format(settings.agent, ", ".join(sorted(AGENTS))))
+    agent = Agent(move_budget=settings.move_budget)
+    if AGENTS[settings.agent] is HamiltonAgent:
+        agent = HamiltonAgent(agent)
+    if settings.deadline is not None:
+        # only imported when needed, it starts threads
+        from asyncagent import AsyncAgent, DeadlinePolicy
+        agent = AsyncAgent(agent, settings.deadline, DeadlinePolicy[settings.deadline_policy])
+    return agent
+
+
+def load_config(path, sections=CONFIG_SECTIONS):
+    """
+    Reads settings from a JSON file, see the documentation of this module.
+
+    :param sections: The (name, settings) of the sections to read, settings missing in the file keep these values.
+    The other sections of the file are ignored, so a tool can read the file of the game window.
+
+    :return: A dictionary with the settings by section name.
+    """
+    import json
+    with open(path) as file:
+        config = json.load(file)
+    unknown = set(config) - {name for name, _ in CONFIG_SECTIONS}
+    if unknown:
+        raise ValueError("{}: unknown section(s) {}".format(path, ", ".join(sorted(unknown))))
+    settings = {}
+    for name, defaults in sections:
+        values = config.get(name, {})
+        unknown = set(values) - set(defaults._fields)
+        if unknown:
+            raise ValueError("{}: unknown setting(s) {} in section {}".format(path, ", ".join(sorted(unknown)), name))
+        settings[name] = defaults._replace(**values)
+    return settings
+
+
+def boolean(text):
+    """Parses a boolean command line argument."""
+    if text.lower() in ("true", "yes", "1"):
+        return True
+    if text.lower() in ("false", "no", "0"):
+        return False
+    raise ValueError(text)
+
+
+def add_settings_arguments(parser, sections=CONFIG_SECTIONS):
+    """
+    Adds an option for every setting of the sections (e.g. --board-width for board_width) and --config to read them
+    from a JSON file. Read the options with settings_from_arguments().
+    """
+    parser.add_argument("--config", metavar="PATH", help="read the settings from a JSON file")
+    for name, defaults in sections:
+        group = parser.add_argument_group("{} settings".format(name))
+        for field, default in zip(defaults._fields, defaults):
+            if isinstance(default, bool):
+                argument_type = boolean
+            elif isinstance(default, (int, float)):
+                argument_type = type(default)
+            elif default is None:
+                argument_type = float
+            else:
+                argument_type = str
+            choices = SETTING_CHOICES.get(field)
+            group.add_argument("--" + field.replace("_", "-"), dest=field, type=argument_type, choices=choices,
+                               metavar="{" + ",".join(choices) + "}" if choices else "VALUE",
+                               help="default: {}".format(default))
+
+
+def settings_from_arguments(args, sections=CONFIG_SECTIONS):
+    """
+    :return: A dictionary with the settings by section name: the defaults of the sections, overridden by the config
+    file and then by the options on the command line.
+
+    The walls of the test setup only fit on boards of at least 16x9, on a smaller board test_config is turned off
+    (random walls are used) unless it is turned on explicitly on the command line, which raises a ValueError.
+    """
+    settings = load_config(args.config, sections) if args.config else {name: defaults for name, defaults in sections}
+    for name, _ in sections:
+        values = {field: getattr(args, field) for field in settings[name]._fields if getattr(args, field) is not None}
+        settings[name] = settings[name]._replace(**values)
+        if isinstance(settings[name], GameSettings) and settings[name].test_config and \
+                not fits_test_walls(settings[name]):
+            if values.get("test_config"):
+                raise ValueError("the walls of the test setup do not fit on a {}x{} board, use --test-config false"
+                                 .format(settings[name].board_width, settings[name].board_height))
+            settings[name] = settings[name]._replace(test_config=False)
+    return settings
+
+
+def fits_test_walls(settings):
+    """:return: Whether the walls of the test setup (board.TEST_WALLS) fit on the board of the GameSettings."""
+    return all(x < settings.board_width and y < settings.board_height for x, y in TEST_WALLS)
+
+
+class Game:
+    """
+    A game as played in the window: the snake starts again when it dies, and the speed of the game is measured. The
+    board is drawn by the window (see Board.draw), the game itself only plays the turns.
+    """
+
+    def __init__(self, settings=GameSettings(), agent=None, canvas_width=None, canvas_height=None, rng=None):
+        """
+        :param agent: The agent controlling the snake, a new Agent when None.
+        :param canvas_width: The width of the canvas the board is drawn on, the board width when None.
+        :param rng: The source of every random decision of the game, the random module itself when None.
+        """
+        self.settings = settings
+        self.snake = Snake(settings.board_width, settings.board_height, settings.starvation_tics, rng, agent)
+        self.board = Board(settings.board_width, settings.board_height, canvas_width or settings.board_width,
+                           canvas_height or settings.board_height, self.snake, settings.food_blocks_max,
+                           settings.wall_blocks_max, settings.test_config, rng)
+        self.speed = SpeedMeter()
+
+    def update(self, tics=1):
+        """Plays the given number of turns, starting again when the snake dies."""
+        for _ in range(tics):
+            if self.snake.update(self.board):
+                self.snake.reset(self.board)
+        self.speed.tic_count += tics
+
+    @staticmethod
+    def frame_schedule(tics_per_second, max_frames_per_second):
+        """
+        :return: A (turns per frame, milliseconds until the next frame) tuple. When the game is paused (no turns per
+        second), no turns are played and the next frame is a second later.
+        """
+        if tics_per_second <= 0:
+            return 0, 1000
+        tics_per_frame = max(1, round(tics_per_second / max_frames_per_second))
+        return tics_per_frame, int(1000 * tics_per_frame / tics_per_second)
+
+
+class SpeedMeter:
+    """Counts the turns and frames of the game, and measures how well the game keeps up with its schedule."""
+
+    def __init__(self):
+        # number of tics and frames since the last report
+        self.tic_count = 0
+        self.frame_count = 0
+        self.reported_at = None
+        # since the last report: the largest delay of the game loop after the time it was scheduled at (the tick
+        # jitter) and the longest frame (the time the window does not respond, updating the game and drawing)
+        self.max_jitter = 0
+        self.max_frame_time = 0
+
+    def frame(self, scheduled_at, started_at, ended_at):
+        """Records a frame which was scheduled at, started and ended at the given times (time.perf_counter())."""
+        self.frame_count += 1
+        self.max_jitter = max(self.max_jitter, started_at - scheduled_at)
+        self.max_frame_time = max(self.max_frame_time, ended_at - started_at)
+
+    def report(self):
+        """:return: A line about the speed once per second (and the counts start again), otherwise None."""
+        now = time.perf_counter()
+        if self.reported_at is None:
+            self.reported_at = now
+            return None
+        if now - self.reported_at < 1:
+            return None
+        elapsed = now - self.reported_at
+        report = "{:.0f} turns/s, {:.0f} frames/s, jitter {:.0f}ms, longest frame {:.0f}ms".format(
+            self.tic_count / elapsed, self.frame_count / elapsed, 1000 * self.max_jitter, 1000 * self.max_frame_time)
+        self.__init__()
+        self.reported_at = now
+        return report
@@ -0,0 +1,256 @@
+"""
+An agent which follows a Hamiltonian cycle over the board, for long snakes. The cycle is built once per wall layout
+and cached. Following a cycle is safe for any snake length, and on a BoardView every move along the cycle costs O(1)
+(on a plain board array, the board is scanned for the head, the walls and the food every move).
+
+The cycle is built from the 2x2 blocks without walls (see Cycle), so it only covers the free cells of boards with few
+walls: 622 of the 623 free cells of the default 25x25 board, 9438 of the 9700 free cells of a 100x100 board with 300
+random walls, but only 108 of the 7000 free cells of a 100x100 board with 3000 random walls. Off the cycle, the agent
+falls back on the A* agent, so on a board crowded with walls it plays like the A* agent.
+"""
+from collections import deque
+import copy
+import functools
+
+from agent import Agent
+from board import BoardView
+from gameobjects import GameObject as GO
+
+
+class Cycle:
+    """
+    A cycle through a set of cells of the board, each cell being adjacent to the next one. It is built from the 2x2
+    blocks of the board without walls: a spanning tree over the largest connected group of these blocks is walked
+    around, so the cycle visits every cell of these blocks. Pairs of neighbouring cells outside these blocks (such as
+    the last row of a board with an odd height) are then added as detours of the cycle, as far as possible. On a board
+    with an odd number of free cells at least one cell is not part of the cycle. A block next to a wall is left out
+    as a whole, so the more walls, the fewer free cells the cycle covers.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.length = len(cells)
+        self.index = {cell: i for i, cell in enumerate(cells)}
+
+    def __contains__(self, cell):
+        return cell in self.index
+
+    def distance(self, a, b):
+        """:return: The number of steps from cell a to cell b along the cycle."""
+        return (self.index[b] - self.index[a]) % self.length
+
+
+@functools.lru_cache(maxsize=16)
+def build_cycle(width, height, walls):
+    """
+    Builds the cycles for the four ways to divide the board into 2x2 blocks (starting at an even or odd x and y).
+
+    :param walls: A frozenset of the (x, y) locations of the walls.
+
+    :return: The longest Cycle, or None when not a single 2x2 block of the board is free of walls.
+    """
+    cycles = [_block_cycle(width, height, walls, x_offset, y_offset) for x_offset in (0, 1) for y_offset in (0, 1)]
+    return max((cycle for cycle in cycles if cycle is not None), key=lambda cycle: cycle.length, default=None)
+
+
+def _block_cycle(width, height, walls, x_offset, y_offset):
+    blocks = {(bx, by) for bx in range((width - x_offset) // 2) for by in range((height - y_offset) // 2)
+              if not any((x_offset + 2 * bx + dx, y_offset + 2 * by + dy) in walls for dx in (0, 1) for dy in (0, 1))}
+
+    # the largest connected group of blocks, with a spanning tree by depth-first search
+    tree = []
+    component = set()
+    visited = set()
+    for root in sorted(blocks):
+        if root in visited:
+            continue
+        visited.add(root)
+        edges = []
+        cells = {root}
+        stack = [root]
+        while stack:
+            bx, by = stack.pop()
+            for neighbour in ((bx + 1, by), (bx, by + 1), (bx - 1, by), (bx, by - 1)):
+                if neighbour in blocks and neighbour not in visited:
+                    visited.add(neighbour)
+                    cells.add(neighbour)
+                    edges.append(((bx, by), neighbour))
+                    stack.append(neighbour)
+        if len(cells) > len(component):
+            component, tree = cells, edges
+    if not component:
+        return None
+
+    # every block starts as a clockwise cycle around its four cells
+    successor = {}
+    for bx, by in component:
+        x, y = x_offset + 2 * bx, y_offset + 2 * by
+        successor[(x, y)] = (x + 1, y)
+        successor[(x + 1, y)] = (x + 1, y + 1)
+        successor[(x + 1, y + 1)] = (x, y + 1)
+        successor[(x, y + 1)] = (x, y)
+    # joining two neighbouring blocks replaces the two opposite edges along their common side by two edges across it,
+    # which merges their cycles into one
+    for a, b in tree:
+        (ax, ay), (bx, by) = min(a, b), max(a, b)
+        x, y = x_offset + 2 * bx, y_offset + 2 * by
+        if ax != bx:
+            # b is right of a: a goes down its right side, b goes up its left side
+            successor[(x - 1, y)] = (x, y)
+            successor[(x, y + 1)] = (x - 1, y + 1)
+        else:
+            # b is below a: a goes left along its bottom side, b goes right along its top side
+            successor[(x + 1, y - 1)] = (x + 1, y)
+            successor[(x, y)] = (x, y - 1)
+
+    # a pair of neighbouring free cells p, q next to an edge a -> b of the cycle becomes the detour a -> p -> q -> b
+    added = True
+    while added:
+        added = False
+        for p in sorted(cell for cell in _free_cells(width, height, walls) if cell not in successor):
+            if p in successor:
+                continue
+            for q in _neighbours(p):
+                if q in successor or q in walls or not (0 <= q[0] < width and 0 <= q[1] < height):
+                    continue
+                a = next((a for a in _neighbours(p) if a in successor and successor[a] in _neighbours(q)), None)
+                if a is not None:
+                    successor[a], successor[p], successor[q] = p, q, successor[a]
+                    added = True
+                    break
+
+    start = min(successor)
+    cells = [start]
+    cell = successor[start]
+    while cell != start:
+        cells.append(cell)
+        cell = successor[cell]
+    return Cycle(cells)
+
+
+def _free_cells(width, height, walls):
+    return [(x, y) for x in range(width) for y in range(height) if (x, y) not in walls]
+
+
+def _neighbours(cell):
+    x, y = cell
+    return (x + 1, y), (x, y + 1), (x - 1, y), (x, y - 1)
+
+
+class HamiltonAgent:
+    """
+    Follows a Hamiltonian cycle of the board, taking a shortcut towards the food only when it is provably safe: the
+    body of the snake lies on the part of the cycle behind the head, so every cell ahead of the head up to the tail is
+    free and the snake may skip ahead to any of these cells. The agent keeps track of the body itself, which is why it
+    has to play the whole game.
+
+    When the head is not on the cycle, or the body does not lie behind the head on the cycle, the moves are made by
+    the fallback Agent (A* search). The fallback Agent also gets the food which is not on the cycle, while the snake
+    fills less than ESCAPE_FRACTION of the cycle.
+    """
+
+    ESCAPE_FRACTION = 0.5
+
+    def __init__(self, fallback=None):
+        """
+        :param fallback: The agent making the moves when the cycle cannot be followed, a new Agent when None.
+        """
+        self.fallback = fallback if fallback is not None else Agent()
+        # the cells occupied by the snake, from tail to head
+        self.body = deque()
+        # whether the body lies on self.cycle behind the head, which moves along the cycle preserve
+        self.aligned = False
+        self.cycle = None
+        # the BoardView.wall_layout self.cycle was built for
+        self.wall_layout = None
+
+    @property
+    def stats(self):
+        """The SearchStats of the fallback agent, which does all the searches."""
+        return self.fallback.stats
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        """See Agent.get_move."""
+        width = len(board)
+        height = len(board[0])
+        if isinstance(board, BoardView):
+            head = board.head
+            foods = board.food
+            # the cycle is only looked up when the walls changed, hashing the walls costs O(walls)
+            if board.wall_layout == self.wall_layout:
+                cycle = self.cycle
+            else:
+                cycle = build_cycle(width, height, frozenset(board.walls))
+                self.wall_layout = board.wall_layout
+        else:
+            cells = [(x, y) for x in range(width) for y in range(height)]
+            head = next(cell for cell in cells if board[cell[0]][cell[1]] == GO.SNAKE_HEAD)
+            walls = frozenset(cell for cell in cells if board[cell[0]][cell[1]] == GO.WALL)
+            foods = [cell for cell in cells if board[cell[0]][cell[1]] == GO.FOOD]
+            cycle = build_cycle(width, height, walls)
+            self.wall_layout = None
+
+        # the snake occupies the last score cells the head visited (at least the head itself)
+        self.body.append(head)
+        while len(self.body) > max(score, 1):
+            self.body.popleft()
+
+        if cycle is not self.cycle:
+            self.cycle = cycle
+            self.aligned = False
+        move = None
+        if cycle is not None and head in cycle:
+            if not self.aligned:
+                self.aligned = self.is_aligned(cycle)
+            if self.aligned:
+                move = self.cycle_move(board, cycle, head, direction, foods)
+        if move is None:
+            self.aligned = False
+            move = self.fallback.get_move(board, score, turns_alive, turns_to_starve, direction)
+        return move
+
+    def is_aligned(self, cycle):
+        """:return: True when every cell of the body lies on the cycle between the tail and the head."""
+        if not all(cell in cycle for cell in self.body):
+            return False
+        head = self.body[-1]
+        tail_distance = cycle.distance(self.body[0], head)
+        return all(cycle.distance(cell, head) <= tail_distance for cell in self.body)
+
+    def cycle_move(self, board, cycle, head, direction, foods):
+        """
+        :return: The move towards the cell furthest ahead on the cycle which neither passes the nearest food on the
+        cycle nor reaches the tail, or None when the fallback agent should take over.
+        """
+        # every cell up to (not including) the tail is free, the tail only moves on after this move
+        limit = cycle.distance(head, self.body[0]) if len(self.body) > 1 else cycle.length
+        foods = [food for food in foods if food in cycle]
+        if foods:
+            target = min(cycle.distance(head, food) for food in foods)
+        elif len(self.body) < HamiltonAgent.ESCAPE_FRACTION * cycle.length:
+            return None
+        else:
+            target = 1
+        best = None
+        for move, _, dx, dy in direction.get_transitions():
+            cell = (head[0] + dx, head[1] + dy)
+            if cell not in cycle or board[cell[0]][cell[1]] not in (GO.FOOD, GO.EMPTY):
+                continue
+            distance = cycle.distance(head, cell)
+            if 0 < distance < limit and distance <= target and (best is None or distance > best[0]):
+                best = (distance, move)
+        return best[1] if best else None
+
+    def clone(self):
+        """:return: An agent in the same state, which continues independently of this agent (see asyncagent.py)."""
+        agent = copy.copy(self)
+        agent.body = deque(self.body)
+        agent.fallback = self.fallback.clone()
+        return agent
+
+    def on_die(self):
+        self.body.clear()
+        self.aligned = False
+        self.cycle = None
+        self.wall_layout = None
+        self.fallback.on_die()
@@ -0,0 +1,119 @@
+import random
+import time
+from collections import namedtuple
+
+from agent import Agent
+from game import AgentSettings, GameSettings, add_settings_arguments, make_agent, new_game, \
+    settings_from_arguments
+
+# Outcome of a single game, death_cause is None when the snake survived the whole turn budget
+GameResult = namedtuple('GameResult', ['game', 'seed', 'score', 'tics_alive', 'death_cause'])
+
+# The settings which can be given on the command line or in a config file, see game.py. Unlike in the window, the
+# agent has no move budget by default, which keeps the games reproducible.
+SETTINGS = [("game", GameSettings()), ("agent", AgentSettings())]
+
+
+def game_seeds(seed, nr_games):
+    """
+    Derives a seed for each game from the seed of the run. Every game is seeded on its own, which makes a game
+    reproducible without replaying the games before it.
+
+    :param seed: The seed of the run.
+    :param nr_games: The number of games in the run.
+
+    :return: A list with nr_games seeds.
+    """
+    rng = random.Random(seed)
+    return [rng.getrandbits(32) for _ in range(nr_games)]
+
+
+def play_game(seed, max_turns, settings=GameSettings(), game=0, agent=None):
+    """
+    Plays a single game (one life of the snake) without any user interface, as fast as possible.
+
+    :param seed: The seed used for every random decision in the game.
+    :param max_turns: The turn budget of the game, the game is stopped when the snake is still alive after this many
+    turns.
+    :param settings: The GameSettings of the game.
+    :param game: The index of the game within its run, copied to the result.
+    :param agent: The agent controlling the snake, a new Agent when None.
+
+    :return: The GameResult of the game.
+    """
+    snake, board = new_game(seed, settings, agent)
+    for _ in range(max_turns):
+        if snake.update(board):
+            break
+    return GameResult(game, seed, snake.score, snake.tics_alive, snake.death_cause)
+
+
+def run_games(seed, nr_games, max_turns, settings=GameSettings(), agent_class=Agent):
+    """
+    Plays nr_games games one after another.
+
+    :param agent_class: The class of the agent, a new agent is created for every game.
+
+    :return: A list with the GameResult of every game, ordered by game index.
+    """
+    return [play_game(game_seed, max_turns, settings, game, agent_class())
+            for game, game_seed in enumerate(game_seeds(seed, nr_games))]
+
+
+def summarize(results):
+    """
+    Aggregates the results of a run.
+
+    :param results: An iterable of GameResult, the order does not matter.
+
+    :return: A dictionary with the aggregated statistics.
+    """
+    results = sorted(results, key=lambda r: r.game)
+    deaths = {}
+    for result in results:
+        cause = result.death_cause.name if result.death_cause else "SURVIVED"
+        deaths[cause] = deaths.get(cause, 0) + 1
+    nr_games = len(results)
+    return {
+        "games": nr_games,
+        "mean_score": sum(r.score for r in results) / nr_games if nr_games else 0,
+        "max_score": max((r.score for r in results), default=0),
+        "mean_tics_alive": sum(r.tics_alive for r in results) / nr_games if nr_games else 0,
+        "deaths": deaths,
+    }
+
+
+def main():
+    # imported here, so that worker processes (see tournament.py) importing this module start quickly
+    import argparse
+    import functools
+    from profiler import Profiler
+
+    parser = argparse.ArgumentParser(description="Runs snake games without a user interface.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=1000, help="turn budget of each game")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="record the latency of the agent and the engine, saved as CSV (per tick) or JSON")
+    add_settings_arguments(parser, SETTINGS)
+    args = parser.parse_args()
+    settings = settings_from_arguments(args, SETTINGS)
+
+    profiler = Profiler()
+    if args.profile:
+        profiler.enable()
+    start = time.perf_counter()
+    results = run_games(args.seed, args.games, args.turns, settings["game"],
+                        functools.partial(make_agent, settings["agent"]))
+    elapsed = time.perf_counter() - start
+    profiler.disable()
+    for key, value in summarize(results).items():
+        print("{}: {}".format(key, value))
+    print("elapsed: {:.2f}s".format(elapsed))
+    if args.profile:
+        profiler.print_summary()
+        profiler.save(args.profile)
+
+
+if __name__ == "__main__":
+    main()
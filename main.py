@@ -1,83 +1,107 @@
-from tkinter import *
-from snake import Snake
-from board import Board
+"""
+The game window: draws the game of game.py with Tk. Tk is only imported when the window is opened, so importing this
+module (or game.py) does not need a display.
 
-root = None
-canvas = None
-scale = None
-canvas_width = 800
-canvas_height = 800
+    python main.py --board-width 30 --test-config false --tics-per-second 10
+    python main.py --config game.json
 
-tics_per_second = 4
+The settings are GAME_SETTINGS, AGENT_SETTINGS and WINDOW_SETTINGS below, overridden by the config file and the
+options on the command line (see "python main.py --help" and game.py).
+"""
+import time
+
+from game import AgentSettings, Game, GameSettings, WindowSettings, add_settings_arguments, make_agent, \
+    settings_from_arguments
 
 """ BEGIN GAME SETTINGS """
-# Board width and height
-board_width = 25
-board_height = 25
-# Maximum number of food blocks on the board
-food_blocks_max = 3
-# Maximum number of wall blocks on the board
-wall_blocks_max = 2
-# Indicates whether the test setup need to be used, turn to false to use the wall_blocks_max for spawning random walls
-test_config = True
-# Number of turns to starve, -1 for disabled
-starvation_tics = -1
+# board_width, board_height: the size of the board
+# food_blocks_max: maximum number of food blocks on the board
+# wall_blocks_max: maximum number of wall blocks on the board
+# test_config: whether the test setup needs to be used, turn to False to use the wall_blocks_max for spawning random
+# walls
+# starvation_tics: number of turns to starve, -1 for disabled
+GAME_SETTINGS = GameSettings(board_width=25, board_height=25, food_blocks_max=3, wall_blocks_max=2, test_config=True,
+                             starvation_tics=-1)
+# move_budget: maximum number of seconds the agent may think about a single move (keeps the window responsive), None
+# for unlimited
+# deadline: maximum number of seconds to wait for the agent to move, which then thinks in a background thread (and
+# about its next move while the board is drawn). None to let the agent think in the game thread.
+# deadline_policy: the move made when the agent misses its deadline, "REPEAT" or "STALL" (see asyncagent.py)
+AGENT_SETTINGS = AgentSettings(agent="astar", move_budget=0.1, deadline=None, deadline_policy="REPEAT")
+# tics_per_second: the initial speed of the game, max_frames_per_second: maximum number of redraws per second, at
+# higher tics per second multiple tics are simulated per redraw
+WINDOW_SETTINGS = WindowSettings(canvas_width=800, canvas_height=800, tics_per_second=4, max_frames_per_second=60)
 """ END GAME SETTINGS """
 
-# game objects
-snake = None
-board = None
-
-
-def callback():
-    update()
+SETTINGS = [("game", GAME_SETTINGS), ("agent", AGENT_SETTINGS), ("window", WINDOW_SETTINGS)]
+
+
+class GameWindow:
+    """The Tk window showing the board, with a slider for the speed of the game and a button to play a single turn."""
+
+    def __init__(self, game, settings=WindowSettings()):
+        # imported here, so that the game can be used without Tk
+        import tkinter
+
+        self.game = game
+        self.settings = settings
+        self.tics_per_second = settings.tics_per_second
+        self.game_loop_due_at = None
+
+        self.root = tkinter.Tk()
+        self.root.title("Snake")
+        self.canvas = tkinter.Canvas(self.root, width=settings.canvas_width, height=settings.canvas_height)
+        self.scale = tkinter.Scale(self.root, from_=0, to=250, orient=tkinter.HORIZONTAL,
+                                   length=settings.canvas_width, tickinterval=25, label="Turns Per Second")
+        self.scale.set(self.tics_per_second)
+        self.scale.bind("<ButtonRelease-1>", self.on_slider_update)
+        self.canvas.pack()
+        self.scale.pack(side=tkinter.LEFT)
+        button = tkinter.Button(self.root, text="Next Step", command=self.update)
+        button.pack()
+
+    def run(self):
+        self.game.board.draw(self.canvas)
+        self.schedule_game_loop(int(1000 / self.tics_per_second) if self.tics_per_second > 0 else 1000)
+        self.root.mainloop()
+
+    def schedule_game_loop(self, delay):
+        self.game_loop_due_at = time.perf_counter() + delay / 1000
+        self.canvas.after(delay, self.game_loop)
+
+    def game_loop(self):
+        tics_per_frame, delay = Game.frame_schedule(self.tics_per_second, self.settings.max_frames_per_second)
+        if tics_per_frame > 0:
+            self.update(tics_per_frame, self.game_loop_due_at)
+        self.schedule_game_loop(delay)
+
+    def update(self, tics=1, scheduled_at=None):
+        frame_start = time.perf_counter()
+        self.game.update(tics)
+        # draw the cells which changed
+        self.game.board.draw(self.canvas)
+        self.game.speed.frame(scheduled_at if scheduled_at is not None else frame_start, frame_start,
+                              time.perf_counter())
+        report = self.game.speed.report()
+        if report is not None:
+            self.root.title("Snake - " + report)
+
+    def on_slider_update(self, event):
+        self.tics_per_second = self.scale.get()
 
 
 def main():
-    global root, canvas, canvas_height, canvas_width, board, snake, scale
-    root = Tk()
-    root.title("Snake")
-    canvas = Canvas(root, width=canvas_width, height=canvas_height)
-    scale = Scale(root, from_=0, to=250, orient=HORIZONTAL, length=canvas_width, tickinterval=25,
-                  label="Turns Per Second")
-    scale.set(tics_per_second)
-    scale.bind("<ButtonRelease-1>", on_slider_update)
-    canvas.pack()
-    scale.pack(side=LEFT)
-    b = Button(root, text="Next Step", command=callback)
-    b.pack()
-    snake = Snake(board_width, board_height, starvation_tics)
-    board = Board(board_width, board_height, canvas_width, canvas_height, snake, food_blocks_max, wall_blocks_max,
-                  test_config)
-    board.draw(canvas)
-    canvas.after(int(1000 / tics_per_second), game_loop)
-    mainloop()
-
-
-def game_loop():
-    global canvas, tics_per_second
-    if tics_per_second > 0:
-        update()
-        canvas.after(int(1000 / tics_per_second), game_loop)
-    else:
-        canvas.after(int(1000), game_loop)
-
-
-def update():
-    global tics_per_second, board, snake, canvas
-    # update gamestate
-    if snake.update(board):
-        snake.reset(board)
-    # clear canvas
-    canvas.delete("all")
-
-    # draw new state
-    board.draw(canvas)
-
-
-def on_slider_update(event):
-    global scale, tics_per_second
-    tics_per_second = scale.get()
+    # imported here like tkinter, so that importing this module does not pay for the command line
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plays snake in a window.")
+    add_settings_arguments(parser, SETTINGS)
+    args = parser.parse_args()
+    settings = settings_from_arguments(args, SETTINGS)
+    window_settings = settings["window"]
+    game = Game(settings["game"], make_agent(settings["agent"]), window_settings.canvas_width,
+                window_settings.canvas_height)
+    GameWindow(game, window_settings).run()
 
 
 if __name__ == "__main__":
@@ -22,7 +22,7 @@ class Direction(Enum):
 
         :return: The new direction after making this move.
         """
-        return Direction((self.value + move.value) % 4)
+        return _NEW_DIRECTIONS[self._value_][move._value_ + 1]
 
     def get_xy_manipulation(self):
         """
@@ -37,13 +37,7 @@ class Direction(Enum):
         :return: A tuple with the x and y manipulation when going straight given the direction. The x value is the
         first element and the y value the second element.
         """
-        m = {
-            Direction.NORTH: (0, -1),
-            Direction.EAST: (1, 0),
-            Direction.SOUTH: (0, 1),
-            Direction.WEST: (-1, 0)
-        }
-        return m[self]
+        return _XY_MANIPULATIONS[self._value_]
 
     def get_xy_moves(self):
         """
@@ -52,14 +46,29 @@ class Direction(Enum):
 
         :return: A list containing all available x y manipulations given the direction.
         """
-        m = {
-            Direction.NORTH: [Direction.NORTH.get_xy_manipulation(), Direction.EAST.get_xy_manipulation(),
-                              Direction.WEST.get_xy_manipulation()],
-            Direction.EAST: [Direction.NORTH.get_xy_manipulation(), Direction.EAST.get_xy_manipulation(),
-                             Direction.SOUTH.get_xy_manipulation()],
-            Direction.SOUTH: [Direction.SOUTH.get_xy_manipulation(), Direction.EAST.get_xy_manipulation(),
-                              Direction.WEST.get_xy_manipulation()],
-            Direction.WEST: [Direction.NORTH.get_xy_manipulation(), Direction.WEST.get_xy_manipulation(),
-                             Direction.SOUTH.get_xy_manipulation()],
-        }
-        return m[self]
+        return list(_XY_MOVES[self._value_])
+
+    def get_transitions(self):
+        """
+        Used to retrieve the outcome of every move given the direction, in the order of Move (left, straight, right).
+        This combines get_new_direction() and get_xy_manipulation() in a single table lookup.
+
+        :return: A tuple with a (move, new direction, x manipulation, y manipulation) tuple for each move.
+        """
+        return _TRANSITIONS[self._value_]
+
+
+# Static tables indexed by the value of a Direction (and the value of a Move + 1), the methods of Direction only look
+# up their result, as they are called for every node of a search.
+_XY_MANIPULATIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+_NEW_DIRECTIONS = tuple(tuple(Direction((direction.value + move.value) % 4) for move in Move)
+                        for direction in Direction)
+_XY_MOVES = (
+    (_XY_MANIPULATIONS[0], _XY_MANIPULATIONS[1], _XY_MANIPULATIONS[3]),
+    (_XY_MANIPULATIONS[0], _XY_MANIPULATIONS[1], _XY_MANIPULATIONS[2]),
+    (_XY_MANIPULATIONS[2], _XY_MANIPULATIONS[1], _XY_MANIPULATIONS[3]),
+    (_XY_MANIPULATIONS[0], _XY_MANIPULATIONS[3], _XY_MANIPULATIONS[2]),
+)
+_TRANSITIONS = tuple(tuple((move, new_direction) + _XY_MANIPULATIONS[new_direction.value]
+                           for move, new_direction in zip(Move, _NEW_DIRECTIONS[direction.value]))
+                     for direction in Direction)
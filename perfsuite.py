@@ -0,0 +1,235 @@
+"""
+A benchmark suite with fixed, seeded scenarios, to verify performance work: the hot paths of the agent and the game
+engine are timed on the same boards every run, the results can be saved as a JSON baseline, and a later run fails
+(exit status 1) when a path got slower than the baseline by more than a threshold.
+
+    python perfsuite.py --save baseline.json
+    python perfsuite.py --baseline baseline.json --threshold 0.25
+
+Every result is a number of seconds per call (per turn for the games), so lower is better. A baseline only makes
+sense on the machine it was recorded on.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import deque, namedtuple
+
+from agent import Agent, FoodProblem, Node, Point, SearchState
+from headless import GameSettings, game_seeds, new_game, play_game
+from move import Direction
+
+FORMAT = "snake-benchmarks 1"
+
+# A fixed board: setup() returns a new (snake, board) tuple, every call the same one
+Scenario = namedtuple('Scenario', ['name', 'setup'])
+
+# The number of turns played per measurement of Snake.update
+UPDATE_TURNS = 100
+# The turn budget of a game measuring the game throughput
+GAME_TURNS = 1000
+
+
+def lay_body(snake, board, length):
+    """
+    Lays out the snake along the columns of the board from the top left corner, going down the first column, up the
+    second one and so on, with its tail in the corner and the head length cells further.
+    """
+    cells = [(x, y if x % 2 == 0 else board.height - 1 - y) for x in range(board.width) for y in range(board.height)]
+    changed_cells = [(snake.x, snake.y)] + cells[:length + 1]
+    (snake.x, snake.y) = cells[length]
+    (neck_x, neck_y) = cells[length - 1]
+    snake.direction = next(direction for direction in Direction
+                           if direction.get_xy_manipulation() == (snake.x - neck_x, snake.y - neck_y))
+    snake.body_parts = deque(reversed(cells[:length]))
+    snake.body_cells = set(cells[:length])
+    snake.score = length
+    for x, y in changed_cells:
+        board.refresh_cell(x, y)
+
+
+def long_snake():
+    snake, board = new_game(1, GameSettings(25, 25, 0, 0, False))
+    lay_body(snake, board, 300)
+    for _ in range(3):
+        board.spawn_new_food()
+    return snake, board
+
+
+SCENARIOS = [
+    # the board of the game window: two walls at fixed locations
+    Scenario("test_config", lambda: new_game(1, GameSettings())),
+    Scenario("random_walls", lambda: new_game(1, GameSettings(50, 50, 3, 250, False))),
+    # a snake of 300 cells filling almost half of the board
+    Scenario("long_snake", long_snake),
+    Scenario("many_food", lambda: new_game(1, GameSettings(50, 50, 100, 250, False))),
+    Scenario("large_board", lambda: new_game(1, GameSettings(200, 200, 3, 4000, False))),
+]
+
+# The full games measuring the throughput: settings and the number of games
+GAMES = [
+    ("test_config", GameSettings(), 5),
+    ("random_walls", GameSettings(50, 50, 3, 250, False), 2),
+]
+
+
+def measure(function, min_time, repeats=5):
+    """
+    Calls function in repeats batches of equal size, a batch taking about min_time / repeats seconds. The first calls
+    (which find the size of a batch) warm up the caches and are not counted.
+
+    :return: The seconds per call of the fastest batch, which is the least disturbed by other processes.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats / 10 or number >= 1 << 20:
+            break
+        number *= 10
+    number = max(1, int(number * min_time / repeats / max(elapsed, 1e-9)))
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        seconds = (time.perf_counter() - start) / number
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def measure_update(scenario, min_time, repeats=5):
+    """
+    Plays UPDATE_TURNS turns from the scenario, on a new board every time, starting again when the snake dies.
+
+    :return: The seconds per turn of the fastest batch, only Snake.update being timed.
+    """
+    best = None
+    end = time.perf_counter() + min_time
+    batches = 0
+    while batches < repeats or (time.perf_counter() < end and batches < 10 * repeats):
+        snake, board = scenario.setup()
+        elapsed = 0
+        for _ in range(UPDATE_TURNS):
+            start = time.perf_counter()
+            died = snake.update(board)
+            elapsed += time.perf_counter() - start
+            if died:
+                snake, board = scenario.setup()
+        batches += 1
+        best = elapsed / UPDATE_TURNS if best is None else min(best, elapsed / UPDATE_TURNS)
+    return best
+
+
+def bench_scenario(scenario, min_time):
+    """:return: A dictionary with the seconds per call of every hot path on the board of the scenario."""
+    snake, board = scenario.setup()
+    view = board.get_view()
+    head = Point(snake.x, snake.y)
+    foods = [Point(x, y) for x, y in view.food]
+
+    def get_move():
+        # a cold decision: a new agent has no plan and an empty transposition table
+        Agent().get_move(view, snake.score, 0, -1, snake.direction)
+
+    def a_star_search():
+        Agent.a_star_search(FoodProblem(Node(SearchState(view), head, snake.direction, 0), foods))
+
+    results = {}
+    for path, function in (("get_move", get_move), ("a_star_search", a_star_search), ("get_copy", board.get_copy),
+                           ("get_free_xy", board.get_free_xy)):
+        results[path] = measure(function, min_time)
+    results["update"] = measure_update(scenario, min_time)
+    return results
+
+
+def bench_games(name, settings, nr_games):
+    """:return: The seconds per turn over seeded games with the given settings."""
+    turns = 0
+    start = time.perf_counter()
+    for game, seed in enumerate(game_seeds(0, nr_games)):
+        turns += play_game(seed, GAME_TURNS, settings, game).tics_alive + 1
+    return (time.perf_counter() - start) / turns
+
+
+def run(min_time, names=None):
+    """
+    Runs the scenarios (all of them when names is None) and the games, printing every result.
+
+    :return: A dictionary with the seconds per call by "scenario.path" (and "games.scenario").
+    """
+    results = {}
+    for scenario in SCENARIOS:
+        if names is None or scenario.name in names:
+            for path, seconds in bench_scenario(scenario, min_time).items():
+                results["{}.{}".format(scenario.name, path)] = seconds
+                print("{:<32} {:>12.4f} ms".format("{}.{}".format(scenario.name, path), 1000 * seconds))
+    for name, settings, nr_games in GAMES:
+        if names is None or name in names:
+            seconds = bench_games(name, settings, nr_games)
+            results["games.{}".format(name)] = seconds
+            print("{:<32} {:>12.4f} ms/turn {:>10.0f} turns/s".format("games.{}".format(name), 1000 * seconds,
+                                                                       1 / seconds))
+    return results
+
+
+def compare(baseline, results, threshold):
+    """
+    Prints every result next to its baseline.
+
+    :param baseline: A dictionary like the one returned by run().
+    :param threshold: The allowed slowdown as a fraction, e.g. 0.25 for 25% slower.
+
+    :return: A list with the names of the paths which regressed beyond the threshold.
+    """
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        if name not in baseline:
+            continue
+        change = seconds / baseline[name] - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print("{:<32} {:>12.4f} ms {:>12.4f} ms {:>+8.1%}{}".format(
+            name, 1000 * baseline[name], 1000 * seconds, change, "  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the seeded benchmark scenarios and compares them to a baseline.")
+    names = [scenario.name for scenario in SCENARIOS]
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help="one of {}, defaults to all scenarios".format(", ".join(names)))
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent in each measurement")
+    parser.add_argument("--save", metavar="PATH", help="save the results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare the results to a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when a path is slower than the baseline by more than this fraction")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in names]
+    if unknown:
+        parser.error("unknown scenario: {}".format(", ".join(unknown)))
+
+    results = run(args.min_time, args.scenarios or None)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"format": FORMAT, "python": platform.python_version(), "machine": platform.machine(),
+                       "min_time": args.min_time, "results": results}, file, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("format") != FORMAT:
+            raise ValueError("{} is not a benchmark baseline (expected format '{}')".format(args.baseline, FORMAT))
+        print()
+        regressions = compare(baseline["results"], results, args.threshold)
+        if regressions:
+            print("{} of {} paths regressed by more than {:.0%}: {}".format(
+                len(regressions), len(results), args.threshold, ", ".join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import csv
+import json
+import math
+import time
+
+from agent import Agent, FoodProblem
+from board import Board
+from snake import Snake
+
+# The instrumented functions: (name, class, attribute). A tick is a call of Snake.update.
+TARGETS = [
+    ("tick", Snake, "update"),
+    ("get_move", Agent, "get_move"),
+    ("a_star_search", Agent, "a_star_search"),
+    ("goal_test", FoodProblem, "goal_test"),
+    ("get_copy", Board, "get_copy"),
+    ("draw", Board, "draw"),
+]
+
+# Counters of the SearchStats of the agent recorded per tick, frontier_peak is the largest frontier during the tick.
+# They are only recorded for an agent with stats which searches during the tick: an AsyncAgent has none, it searches
+# in its worker thread, also between the ticks.
+TICK_COUNTERS = ["searches", "expansions", "frontier_peak", "safety_checks", "safety_cache_hits",
+                 "nested_searches_avoided", "plan_revalidations", "plan_repairs", "replans"]
+
+
+def percentile(values, fraction):
+    """
+    :return: The value at the given fraction (0 - 1) of the sorted values (nearest rank), or 0 if there are none.
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+
+class Profiler:
+    """
+    Records the wall time of every call to the instrumented functions (see TARGETS), and per tick the work done by the
+    agent. The functions are only wrapped while the profiler is enabled, so a disabled profiler costs nothing.
+
+    Usage: profiler = Profiler(); profiler.enable(); ...play games...; profiler.disable(); print(profiler.summary())
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.originals = {}
+        self.calls = {name: [] for name, _, _ in TARGETS}
+        self.ticks = []
+
+    def enable(self):
+        if self.enabled:
+            return
+        for name, cls, attribute in TARGETS:
+            original = cls.__dict__[attribute]
+            self.originals[name] = original
+            if isinstance(original, staticmethod):
+                setattr(cls, attribute, staticmethod(self._timed(name, original.__func__)))
+            else:
+                setattr(cls, attribute, self._timed(name, original))
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for name, cls, attribute in TARGETS:
+            setattr(cls, attribute, self.originals[name])
+        self.originals = {}
+        self.enabled = False
+
+    def clear(self):
+        for durations in self.calls.values():
+            del durations[:]
+        del self.ticks[:]
+
+    def _timed(self, name, function):
+        if name == "tick":
+            return self._timed_tick(function)
+        durations = self.calls[name]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                durations.append(time.perf_counter() - start)
+
+        timed.__wrapped__ = function
+        return timed
+
+    def _timed_tick(self, function):
+        durations = self.calls["tick"]
+
+        def timed_tick(snake, *args, **kwargs):
+            stats = getattr(snake.agent, "stats", None)
+            if stats is not None:
+                before = {counter: getattr(stats, counter) for counter in TICK_COUNTERS}
+                stats.frontier_peak = 0
+            start = time.perf_counter()
+            try:
+                return function(snake, *args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                durations.append(duration)
+                tick = {"seconds": duration}
+                if stats is not None:
+                    tick.update({counter: getattr(stats, counter) - before[counter] for counter in TICK_COUNTERS})
+                    tick["frontier_peak"] = stats.frontier_peak
+                    stats.frontier_peak = max(stats.frontier_peak, before["frontier_peak"])
+                self.ticks.append(tick)
+
+        timed_tick.__wrapped__ = function
+        return timed_tick
+
+    def summary(self):
+        """
+        :return: A dictionary with, per instrumented function that was called, the number of calls, the total time
+        and the p50, p99 and maximum latency, all in seconds.
+        """
+        summary = {}
+        for name, durations in self.calls.items():
+            if durations:
+                summary[name] = {"calls": len(durations), "total": sum(durations),
+                                 "p50": percentile(durations, 0.5), "p99": percentile(durations, 0.99),
+                                 "max": max(durations)}
+        return summary
+
+    def to_json(self, path):
+        with open(path, "w") as file:
+            json.dump({"summary": self.summary(), "ticks": self.ticks, "calls": self.calls}, file, indent=1)
+
+    def to_csv(self, path):
+        """
+        Writes one row per tick, with its duration and the counters of the agent (empty when they were not recorded).
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=["tick", "seconds"] + TICK_COUNTERS)
+            writer.writeheader()
+            for index, tick in enumerate(self.ticks):
+                writer.writerow(dict(tick, tick=index))
+
+    def save(self, path):
+        if path.endswith(".csv"):
+            self.to_csv(path)
+        else:
+            self.to_json(path)
+
+    def print_summary(self):
+        for name, summary in self.summary().items():
+            print("{:<14} {:>8} calls {:>9.3f}s total {:>9.3f}ms p50 {:>9.3f}ms p99 {:>9.3f}ms max".format(
+                name, summary["calls"], summary["total"], 1000 * summary["p50"], 1000 * summary["p99"],
+                1000 * summary["max"]))
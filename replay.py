@@ -0,0 +1,184 @@
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+
+from agent import Agent
+from headless import GameSettings, new_game
+from move import Move
+from profiler import Profiler
+
+# A recorded game: everything needed to play it again. The result is a dictionary with score, tics_alive and
+# death_cause, as recorded.
+Replay = namedtuple('Replay', ['seed', 'settings', 'moves', 'result'])
+
+FORMAT = "snake-replay 1"
+# an invalid move (which kills the snake) is recorded as X
+MOVE_CHARACTERS = {Move.LEFT: "L", Move.STRAIGHT: "S", Move.RIGHT: "R", None: "X"}
+CHARACTER_MOVES = {character: move for move, character in MOVE_CHARACTERS.items()}
+
+
+class RecordingAgent:
+    """Passes the calls on to an agent and records the moves it returns."""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.moves = []
+
+    @property
+    def stats(self):
+        """The SearchStats of the agent, see profiler.py."""
+        return getattr(self.agent, "stats", None)
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        move = self.agent.get_move(board, score, turns_alive, turns_to_starve, direction)
+        self.moves.append(move)
+        return move
+
+    def on_die(self):
+        self.agent.on_die()
+
+
+class ReplayAgent:
+    """Returns the recorded moves, one per turn."""
+
+    def __init__(self, moves):
+        self.moves = moves
+        self.turn = 0
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        move = self.moves[self.turn]
+        self.turn += 1
+        return move
+
+    def on_die(self):
+        pass
+
+
+def record_game(seed, max_turns, settings=GameSettings(), agent=None):
+    """
+    Plays a game like headless.play_game and records it.
+
+    :return: The Replay of the game.
+    """
+    recorder = RecordingAgent(agent if agent is not None else Agent())
+    snake, board = new_game(seed, settings, recorder)
+    for _ in range(max_turns):
+        if snake.update(board):
+            break
+    return Replay(seed, settings, recorder.moves, game_result(snake))
+
+
+def play_replay(replay, until=None):
+    """
+    Plays a recorded game again, as fast as possible. Since the game is seeded, the board develops exactly as it did
+    while recording.
+
+    :param until: Stop after this many turns, by default all recorded moves are played.
+
+    :return: A (snake, board) tuple with the state of the game after the last played turn.
+    """
+    agent = ReplayAgent(replay.moves)
+    snake, board = new_game(replay.seed, replay.settings, agent)
+    turns = 0
+    while until is None or turns < until:
+        # a starving snake dies without asking the agent for a move, so its last turn has no recorded move
+        if agent.turn == len(replay.moves) and snake.tics_to_starve != 0:
+            break
+        turns += 1
+        if snake.update(board):
+            break
+    return snake, board
+
+
+def game_result(snake):
+    """:return: The result of the game of the snake, as recorded in a Replay."""
+    return {"score": snake.score, "tics_alive": snake.tics_alive,
+            "death_cause": snake.death_cause.name if snake.death_cause else None}
+
+
+def first_divergence(replay, agent=None):
+    """
+    Plays the recorded game with an agent (by default the current Agent) and compares its moves to the recorded ones,
+    to check whether an agent version plays the game identically.
+
+    :return: The first turn at which the agent chose another move, or None if all moves are the same.
+    """
+    recorder = RecordingAgent(agent if agent is not None else Agent())
+    snake, board = new_game(replay.seed, replay.settings, recorder)
+    for turn, recorded_move in enumerate(replay.moves):
+        died = snake.update(board)
+        if recorder.moves[turn] != recorded_move:
+            return turn
+        if died:
+            break
+    return None
+
+
+def write_replay(path, replay):
+    """
+    Writes a replay as four lines of text: the format, the seed and settings (JSON), the moves (one character per
+    move: L, S, R or X) and the recorded result (JSON).
+    """
+    with open(path, "w") as file:
+        file.write(FORMAT + "\n")
+        file.write(json.dumps({"seed": replay.seed, "settings": replay.settings._asdict()}) + "\n")
+        file.write("".join(MOVE_CHARACTERS.get(move, "X") for move in replay.moves) + "\n")
+        file.write(json.dumps(replay.result) + "\n")
+
+
+def read_replay(path):
+    with open(path) as file:
+        lines = file.read().split("\n")
+    if lines[0] != FORMAT:
+        raise ValueError("{} is not a replay (expected '{}' on the first line)".format(path, FORMAT))
+    header = json.loads(lines[1])
+    moves = [CHARACTER_MOVES[character] for character in lines[2]]
+    return Replay(header["seed"], GameSettings(**header["settings"]), moves, json.loads(lines[3]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Records snake games and plays them again.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    record = commands.add_parser("record", help="play a game with the agent and record it")
+    record.add_argument("path")
+    record.add_argument("--seed", type=int, default=0)
+    record.add_argument("--turns", type=int, default=1000, help="turn budget of the game")
+    play = commands.add_parser("play", help="play a recorded game again without the agent")
+    play.add_argument("path")
+    play.add_argument("--until", type=int, help="stop after this many turns")
+    verify = commands.add_parser("verify", help="check whether the current agent plays a recorded game identically")
+    verify.add_argument("path")
+    verify.add_argument("--profile", metavar="PATH", help="profile the agent while verifying, see profiler.py")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        replay = record_game(args.seed, args.turns)
+        write_replay(args.path, replay)
+        print("recorded {} turns: {}".format(len(replay.moves), replay.result))
+    elif args.command == "play":
+        start = time.perf_counter()
+        replay = read_replay(args.path)
+        snake, board = play_replay(replay, args.until)
+        print("played {} turns in {:.3f}s: score {}, death cause {}".format(
+            snake.tics_alive, time.perf_counter() - start, snake.score,
+            snake.death_cause.name if snake.death_cause else None))
+        if args.until is None and game_result(snake) != replay.result:
+            print("the result differs from the recorded result: {}".format(replay.result))
+            sys.exit(1)
+    elif args.command == "verify":
+        profiler = Profiler()
+        if args.profile:
+            profiler.enable()
+        turn = first_divergence(read_replay(args.path))
+        profiler.disable()
+        print("identical" if turn is None else "diverges at turn {}".format(turn))
+        if args.profile:
+            profiler.print_summary()
+            profiler.save(args.profile)
+
+
+if __name__ == "__main__":
+    main()
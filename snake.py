@@ -1,55 +1,83 @@
-from random import randint
+from collections import deque
+from enum import Enum
+import random
 
 from agent import Agent
+from board import BoardFullError
 from gameobjects import GameObject
 from move import Direction, Move
 
 
+class DeathCause(Enum):
+    STARVATION = 1
+    INVALID_MOVE = 2
+    OUT_OF_BOUNDS = 3
+    WALL = 4
+    BODY = 5
+    # not a death: the snake filled the board, there is no cell left for new food
+    BOARD_FULL = 6
+
+
 class Snake:
 
-    def __init__(self, board_width, board_height, max_tics_to_starve):
+    def __init__(self, board_width, board_height, max_tics_to_starve, rng=None, agent=None):
         self.board_width = board_width
         self.board_height = board_height
-        self.x = randint(0, board_width - 1)
-        self.y = randint(0, board_height - 1)
+        # source of every random decision of the snake, the random module itself unless a seeded Random is given
+        self.rng = rng if rng is not None else random
+        self.x = self.rng.randint(0, board_width - 1)
+        self.y = self.rng.randint(0, board_height - 1)
         self.direction = Direction.NORTH
-        self.body_parts = []
+        # body parts ordered from neck to tail, body_cells holds the same cells for O(1) membership tests
+        self.body_parts = deque()
+        self.body_cells = set()
         self.score = 0
         self.tics_alive = 0
         self.tics_to_starve = max_tics_to_starve
         self.max_tics_to_starve = max_tics_to_starve
-        self.agent = Agent()
+        self.death_cause = None
+        self.agent = agent if agent is not None else Agent()
 
     def update(self, board):
         if len(self.body_parts) > 0 and self.body_parts[0] != (self.x, self.y):
-            self.body_parts = [(self.x, self.y)] + self.body_parts
-            del self.body_parts[-1]
+            self.push_body_part(self.x, self.y)
+            tail = self.body_parts.pop()
+            self.body_cells.discard(tail)
+            board.refresh_cell(*tail)
 
         # check starvation (if enabled)
         if self.tics_to_starve != -1 and self.tics_to_starve == 0:
+            self.death_cause = DeathCause.STARVATION
             return True
 
         # retrieve move from the agent
-        move = self.agent.get_move(board.get_copy(), self.score, self.tics_alive, self.tics_to_starve, self.direction)
+        move = self.agent.get_move(board.get_view(), self.score, self.tics_alive, self.tics_to_starve, self.direction)
 
         # check return value of get_move
         if not (move == Move.RIGHT or move == Move.LEFT or move == Move.STRAIGHT):
+            self.death_cause = DeathCause.INVALID_MOVE
             return True
 
         self.direction = self.direction.get_new_direction(move)
         manipulation = self.direction.get_xy_manipulation()
         self.x += manipulation[0]
         self.y += manipulation[1]
+        board.refresh_cell(self.x - manipulation[0], self.y - manipulation[1])
+        board.refresh_cell(self.x, self.y)
 
         # check if died
-        if self.died(board):
+        self.death_cause = self.died(board)
+        if self.death_cause:
             return True
 
         # check on collision with food
         if board.board[self.x][self.y] == GameObject.FOOD:
-            self.body_parts = [(self.x, self.y)] + self.body_parts
+            self.push_body_part(self.x, self.y)
             self.score += 1
-            board.eat_food(self.x, self.y)
+            try:
+                board.eat_food(self.x, self.y)
+            except BoardFullError:
+                self.death_cause = DeathCause.BOARD_FULL
             if self.max_tics_to_starve != -1:
                 self.tics_to_starve = self.max_tics_to_starve + 1
 
@@ -57,7 +85,7 @@ class Snake:
         if self.max_tics_to_starve != -1:
             self.tics_to_starve -= 1
 
-        return False
+        return self.death_cause is not None
 
     def reset(self, board):
         print("Score achieved: {}. Turns it took: {}".format(self.score, self.tics_alive))
@@ -66,22 +94,35 @@ class Snake:
         self.score = 0
         self.direction = Direction.NORTH
         self.tics_to_starve = self.max_tics_to_starve
+        self.death_cause = None
+        changed_cells = [(self.x, self.y)] + list(self.body_parts)
         self.x, self.y = board.get_free_xy()
-        self.body_parts = []
+        self.body_parts.clear()
+        self.body_cells.clear()
+        changed_cells.append((self.x, self.y))
+        for x, y in changed_cells:
+            board.refresh_cell(x, y)
+
+    def push_body_part(self, x, y):
+        self.body_parts.appendleft((x, y))
+        self.body_cells.add((x, y))
 
     def contains_body(self, x, y):
-        return (x, y) in self.body_parts
+        return (x, y) in self.body_cells
 
     def contains_head(self, x, y):
         return self.x == x and self.y == y
 
     def died(self, board):
+        """
+        :return: The DeathCause when the current head position is fatal, otherwise None.
+        """
         if self.x < 0 or self.x >= board.width:
-            return True
+            return DeathCause.OUT_OF_BOUNDS
         if self.y < 0 or self.y >= board.height:
-            return True
+            return DeathCause.OUT_OF_BOUNDS
         if board.is_wall_at(self.x, self.y):
-            return True
-        if (self.x, self.y) in self.body_parts:
-            return True
-        return False
+            return DeathCause.WALL
+        if (self.x, self.y) in self.body_cells:
+            return DeathCause.BODY
+        return None
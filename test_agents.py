@@ -0,0 +1,85 @@
+import unittest
+
+from asyncagent import AsyncAgent, DeadlinePolicy
+from game import AGENTS, SETTING_CHOICES, AgentSettings, GameSettings, make_agent, new_game
+from gameobjects import GameObject
+from hamilton import HamiltonAgent
+from headless import play_game
+from move import Move
+from snake import DeathCause
+
+
+class BoardRecorder:
+    """Agent which keeps the boards it is asked to decide on and goes straight, its clones record into the same list."""
+
+    def __init__(self):
+        self.boards = []
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        self.boards.append(board)
+        return Move.STRAIGHT
+
+    def clone(self):
+        return self
+
+    def on_die(self):
+        pass
+
+
+class MakeAgentTest(unittest.TestCase):
+
+    def play(self, agent, turns=30):
+        snake, board = new_game(1, GameSettings(), agent)
+        for _ in range(turns):
+            if snake.update(board):
+                break
+        return snake
+
+    def test_every_agent_plays(self):
+        for name in AGENTS:
+            with self.subTest(agent=name):
+                snake = self.play(make_agent(AgentSettings(agent=name)))
+                self.assertIsNone(snake.death_cause)
+
+    def test_every_agent_plays_with_deadline(self):
+        for name in AGENTS:
+            for policy in ("REPEAT", "STALL"):
+                with self.subTest(agent=name, policy=policy):
+                    agent = make_agent(AgentSettings(agent=name, deadline=0.5, deadline_policy=policy))
+                    try:
+                        snake = self.play(agent)
+                    finally:
+                        agent.close()
+                    self.assertIsNone(snake.death_cause)
+                    self.assertGreater(snake.tics_alive, 0)
+
+    def test_deadline_policy_choices(self):
+        # game.py does not import asyncagent, it lists the policies itself
+        self.assertEqual(SETTING_CHOICES["deadline_policy"], [policy.name for policy in DeadlinePolicy])
+
+    def test_deadline_with_board_array(self):
+        # the worker decides on a copy, the caller may change its array after get_move returned
+        snake, board = new_game(1)
+        grid = board.get_copy()
+        recorder = BoardRecorder()
+        agent = AsyncAgent(recorder, 0.5)
+        try:
+            agent.get_move(grid, snake.score, 0, -1, snake.direction)
+        finally:
+            agent.close()
+        grid[0][0] = GameObject.WALL
+        self.assertEqual(recorder.boards[0][0][0], board.get_view()[0][0])
+
+    def test_full_board(self):
+        # the cycle agent fills the board, which ends the game instead of failing to spawn the next food
+        result = play_game(1, 5000, GameSettings(6, 6, 1, 0, False), agent=HamiltonAgent())
+        self.assertEqual(result.death_cause, DeathCause.BOARD_FULL)
+        self.assertEqual(result.score, 6 * 6)
+
+    def test_unknown_agent(self):
+        with self.assertRaises(ValueError):
+            make_agent(AgentSettings(agent="unknown"))
+
+
+if __name__ == "__main__":
+    unittest.main()
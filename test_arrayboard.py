@@ -0,0 +1,67 @@
+import random
+import unittest
+
+import arrayboard
+from board import Board
+from gameobjects import GameObject
+from move import Direction, Move
+from snake import Snake
+
+
+class ScriptedAgent:
+    """Makes the given moves and keeps the boards it was shown."""
+
+    def __init__(self, moves):
+        self.moves = iter(moves)
+        self.boards = []
+
+    def get_move(self, board, score, turns_alive, turns_to_starve, direction):
+        self.boards.append(arrayboard.to_array(board))
+        return next(self.moves)
+
+    def on_die(self):
+        pass
+
+
+@unittest.skipIf(arrayboard.np is None, "needs NumPy")
+class BatchGameTest(unittest.TestCase):
+
+    def sync_board(self, board, batch):
+        """Places the walls and food of the single game of the batch on the board, as both spawn food differently."""
+        grid = batch.grid[0]
+        for x in range(batch.width):
+            for y in range(batch.height):
+                game_object = GameObject(int(grid[x, y]))
+                if board.board[x][y] != game_object:
+                    board.set_game_object_at(x, y, game_object)
+
+    def test_same_game_as_snake(self):
+        for seed in range(40):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                moves = [rng.choice(list(Move)) for _ in range(200)]
+                batch = arrayboard.BatchGame(1, 12, 12, 10, 10, seed=seed)
+                agent = ScriptedAgent(moves)
+                snake = Snake(12, 12, -1, random.Random(seed), agent)
+                board = Board(12, 12, 12, 12, snake, 0, 0, False, random.Random(seed))
+                old_head = (snake.x, snake.y)
+                snake.x, snake.y = int(batch.x[0]), int(batch.y[0])
+                board.refresh_cell(*old_head)
+                board.refresh_cell(snake.x, snake.y)
+                self.assertEqual(snake.direction, Direction(int(batch.direction[0])))
+
+                for turn, move in enumerate(moves):
+                    self.sync_board(board, batch)
+                    observation = batch.observation()[0]
+                    died = snake.update(board)
+                    self.assertTrue((agent.boards[-1] == observation).all(), "turn {}".format(turn))
+                    ended = batch.step(arrayboard.np.array([move.value]))[0]
+                    self.assertEqual(died, ended, "turn {}".format(turn))
+                    if died:
+                        self.assertEqual(snake.death_cause.value, batch.death_cause[0])
+                        break
+                    self.assertEqual((snake.x, snake.y, snake.score), (batch.x[0], batch.y[0], batch.score[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import argparse
+import unittest
+
+from game import CONFIG_SECTIONS, add_settings_arguments, new_game, settings_from_arguments
+
+
+class SettingsTest(unittest.TestCase):
+
+    def settings(self, *arguments):
+        parser = argparse.ArgumentParser()
+        add_settings_arguments(parser, CONFIG_SECTIONS)
+        return settings_from_arguments(parser.parse_args(arguments), CONFIG_SECTIONS)
+
+    def test_small_board(self):
+        # the walls of the test setup do not fit, random walls are used instead
+        settings = self.settings("--board-width", "10", "--board-height", "10")["game"]
+        self.assertFalse(settings.test_config)
+        snake, board = new_game(1, settings)
+        self.assertEqual(len(board.walls), settings.wall_blocks_max)
+
+    def test_default_board(self):
+        self.assertTrue(self.settings()["game"].test_config)
+        self.assertTrue(self.settings("--board-width", "16", "--board-height", "9")["game"].test_config)
+
+    def test_small_board_with_test_config(self):
+        with self.assertRaises(ValueError):
+            self.settings("--board-width", "10", "--test-config", "true")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from game import GameSettings
+from replay import first_divergence, game_result, play_replay, read_replay, record_game, write_replay
+
+
+class ReplayTest(unittest.TestCase):
+
+    def assert_replays(self, replay):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.replay")
+            write_replay(path, replay)
+            replay = read_replay(path)
+        snake, _ = play_replay(replay)
+        self.assertEqual(game_result(snake), replay.result)
+        self.assertIsNone(first_divergence(replay))
+
+    def test_starvation(self):
+        # the snake starves without making a last move
+        replay = record_game(1, 1000, GameSettings(starvation_tics=8))
+        self.assertEqual(replay.result["death_cause"], "STARVATION")
+        self.assertEqual(len(replay.moves), replay.result["tics_alive"])
+        self.assert_replays(replay)
+
+    def test_death(self):
+        replay = record_game(1, 2000)
+        self.assertIsNotNone(replay.result["death_cause"])
+        self.assert_replays(replay)
+
+    def test_survival(self):
+        replay = record_game(2, 100)
+        self.assertIsNone(replay.result["death_cause"])
+        self.assert_replays(replay)
+
+    def test_until(self):
+        replay = record_game(1, 100)
+        snake, _ = play_replay(replay, until=40)
+        self.assertEqual(snake.tics_alive, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import itertools
+import multiprocessing
+import time
+
+from headless import GameSettings, game_seeds, play_game, summarize
+
+
+def settings_grid(base=GameSettings(), **values):
+    """
+    Builds every combination of the given setting values.
+
+    Example: settings_grid(board_width=[25, 50], starvation_tics=[-1, 200]) results in four GameSettings.
+
+    :param base: The GameSettings used for every setting that is not part of the grid.
+    :param values: For each setting to vary, the list of values to try.
+
+    :return: A list of GameSettings.
+    """
+    names = sorted(values)
+    return [base._replace(**dict(zip(names, combination)))
+            for combination in itertools.product(*(values[name] for name in names))]
+
+
+def _play(task):
+    settings, game, seed, max_turns = task
+    return settings, play_game(seed, max_turns, settings, game)
+
+
+def _tasks(seed, nr_games, max_turns, grid):
+    seeds = game_seeds(seed, nr_games)
+    for settings in grid:
+        for game, game_seed in enumerate(seeds):
+            yield settings, game, game_seed, max_turns
+
+
+def run_tournament(seed, nr_games, max_turns, grid=(GameSettings(),), processes=None):
+    """
+    Plays nr_games games for each GameSettings in the grid, spread over a pool of worker processes. Each setting is
+    played with the same game seeds, so the settings are compared on the same sequence of games.
+
+    :param processes: The number of worker processes, defaults to the number of cores. With 1 process the games are
+    played in the current process.
+
+    :return: A generator yielding a (GameSettings, GameResult) tuple for every game as soon as it is finished.
+    """
+    tasks = _tasks(seed, nr_games, max_turns, grid)
+    processes = processes or multiprocessing.cpu_count()
+    if processes == 1:
+        yield from map(_play, tasks)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(_play, tasks)
+
+
+def aggregate(results):
+    """
+    Aggregates the streamed results of a tournament per GameSettings. The outcome does not depend on the order in
+    which the games finished, and is therefore identical to a serial run.
+
+    :param results: An iterable of (GameSettings, GameResult) tuples.
+
+    :return: A dictionary mapping each GameSettings to the summary of its games.
+    """
+    per_settings = {}
+    for settings, result in results:
+        per_settings.setdefault(settings, []).append(result)
+    return {settings: summarize(per_settings[settings]) for settings in sorted(per_settings)}
+
+
+def main():
+    # imported here, so that worker processes started by spawning (the default on Windows and macOS) start quickly
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Runs snake games on all cores.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--games", type=int, default=100, help="number of games for each setting")
+    parser.add_argument("--turns", type=int, default=1000, help="turn budget of each game")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--board-width", type=int, nargs="+")
+    parser.add_argument("--food-blocks-max", type=int, nargs="+")
+    parser.add_argument("--wall-blocks-max", type=int, nargs="+")
+    parser.add_argument("--starvation-tics", type=int, nargs="+")
+    args = parser.parse_args()
+
+    values = {}
+    if args.board_width:
+        # boards are square, the walls of the test setup are placed for the default board size
+        values["board_width"] = args.board_width
+        values["test_config"] = [False]
+    if args.food_blocks_max:
+        values["food_blocks_max"] = args.food_blocks_max
+    if args.wall_blocks_max:
+        # random walls are only spawned when the test setup is disabled
+        values["wall_blocks_max"] = args.wall_blocks_max
+        values["test_config"] = [False]
+    if args.starvation_tics:
+        values["starvation_tics"] = args.starvation_tics
+    grid = settings_grid(**values)
+    if args.board_width:
+        grid = [settings._replace(board_height=settings.board_width) for settings in grid]
+
+    start = time.perf_counter()
+    results = []
+    for settings, result in run_tournament(args.seed, args.games, args.turns, grid, args.processes):
+        results.append((settings, result))
+        print("{}/{} games finished".format(len(results), len(grid) * args.games), end="\r", flush=True)
+    elapsed = time.perf_counter() - start
+    print()
+    for settings, summary in aggregate(results).items():
+        print(settings)
+        for key, value in summary.items():
+            print("    {}: {}".format(key, value))
+    print("elapsed: {:.2f}s ({:.1f} games/s)".format(elapsed, len(results) / elapsed))
+
+
+if __name__ == "__main__":
+    main()